@@ -0,0 +1,206 @@
+"""
+Buildable ideas index
+Stored ideas' component lists as bitsets for "what can I build with these parts" queries
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from component_catalog import normalize_name
+from similarity_cache import NUMPY_AVAILABLE, load_numpy
+
+_WORD_BITS = 64
+_WORD_MASK = (1 << _WORD_BITS) - 1
+
+# (rowid, idea id, difficulty, component names) as read from the idea store
+IdeaRow = Tuple[int, str, Optional[str], List[str]]
+
+
+class _Rows:
+    """One generation of the index; rebuilt off to the side and swapped in"""
+
+    def __init__(self):
+        self.last_rowid = 0
+        # component key -> bit, and bit -> component key
+        self.bits: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.ids: List[str] = []
+        # difficulty -> small integer code stored per row
+        self.difficulty_codes: Dict[str, int] = {}
+        self.count = 0
+        if NUMPY_AVAILABLE:
+            # Allocated by the first append, so numpy isn't imported with the module
+            self.matrix = None
+            self.difficulties = None
+        else:
+            self.rows: List[int] = []
+            self.difficulties: List[int] = []
+
+    def bit(self, key: str) -> int:
+        bit = self.bits.get(key)
+        if bit is None:
+            bit = self.bits[key] = len(self.keys)
+            self.keys.append(key)
+        return bit
+
+    def difficulty_code(self, difficulty: str) -> int:
+        return self.difficulty_codes.setdefault(difficulty, len(self.difficulty_codes))
+
+    def append(self, idea_id: str, difficulty: str, bits: List[int]) -> None:
+        mask = sum(1 << bit for bit in set(bits))
+        code = self.difficulty_code(difficulty)
+        if NUMPY_AVAILABLE:
+            np = load_numpy()
+            if self.matrix is None:
+                self.matrix = np.zeros((1024, 1), dtype=np.uint64)
+                self.difficulties = np.zeros(1024, dtype=np.int32)
+            rows, words = self.matrix.shape
+            needed_words = max(bits) // _WORD_BITS + 1
+            if self.count == rows or needed_words > words:
+                # Grow into new arrays; readers holding the old ones still see a consistent snapshot
+                new_rows = rows * 2 if self.count == rows else rows
+                grown = np.zeros((new_rows, max(words, needed_words)), dtype=np.uint64)
+                grown[:self.count, :words] = self.matrix[:self.count]
+                levels = np.zeros(new_rows, dtype=np.int32)
+                levels[:self.count] = self.difficulties[:self.count]
+                self.matrix, self.difficulties = grown, levels
+            self.matrix[self.count, :needed_words] = [(mask >> (word * _WORD_BITS)) & _WORD_MASK
+                                                      for word in range(needed_words)]
+            self.difficulties[self.count] = code
+        else:
+            self.rows.append(mask)
+            self.difficulties.append(code)
+        self.ids.append(idea_id)
+        self.count += 1
+
+
+class BuildableIndex:
+    """Bitsets of the components each stored idea needs.
+
+    Component names are mapped to catalog ids when the catalog has a component
+    with that name, otherwise to the normalized name, and each distinct key
+    gets one bit. Finding ideas buildable from an inventory is then an AND-NOT
+    and popcount per idea, vectorized over a uint64 matrix when numpy is
+    installed. Rows are only ever appended, so a query reads a snapshot without
+    locking while sync() adds new ideas from a worker thread.
+    """
+
+    def __init__(self, resolve: Callable[[str], Optional[str]]):
+        # Catalog id for a component name, or None
+        self._resolve = resolve
+        self._rows = _Rows()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._rows.count
+
+    def component_key(self, name: Any) -> str:
+        component_id = self._resolve(name)
+        return component_id if component_id is not None else f"name:{normalize_name(name)}"
+
+    def _add(self, rows: _Rows, ideas: Iterable[IdeaRow]) -> None:
+        # The same few hundred names recur across ideas
+        keys_by_name: Dict[str, str] = {}
+        for rowid, idea_id, difficulty, names in ideas:
+            rows.last_rowid = max(rows.last_rowid, rowid)
+            keys = set()
+            for name in map(str, names or ()):
+                key = keys_by_name.get(name)
+                if key is None:
+                    key = keys_by_name[name] = self.component_key(name) if name.strip() else ""
+                if key:
+                    keys.add(key)
+            if keys:
+                rows.append(idea_id, normalize_name(difficulty or ""), [rows.bit(key) for key in keys])
+
+    def sync(self, fetch: Callable[[int], Iterable[IdeaRow]]) -> int:
+        """Append ideas stored since the last sync; fetch(after_rowid) returns them in rowid order"""
+        with self._lock:
+            rows = self._rows
+            before = rows.count
+            self._add(rows, fetch(rows.last_rowid))
+            return rows.count - before
+
+    def rebuild(self, fetch: Callable[[int], Iterable[IdeaRow]]) -> None:
+        """Re-map every stored idea, e.g. after the catalog changed"""
+        with self._lock:
+            rows = _Rows()
+            self._add(rows, fetch(0))
+            self._rows = rows
+
+    def query(self, inventory: Iterable[str], max_missing: int = 0, limit: int = 20,
+              difficulty: Optional[str] = None) -> Tuple[List[Tuple[str, List[str]]], int]:
+        """Ideas needing at most max_missing components beyond the inventory keys.
+
+        Returns ([(idea id, missing component keys)], total matches), fewest
+        missing first and newest first among equals.
+        """
+        rows = self._rows
+        count = rows.count
+        owned = [rows.bits[key] for key in set(inventory) if key in rows.bits]
+        wanted = rows.difficulty_codes.get(normalize_name(difficulty), -1) if difficulty else None
+        if NUMPY_AVAILABLE:
+            if not count:
+                # Nothing appended yet, so the matrix isn't allocated
+                return [], 0
+            np = load_numpy()
+            matrix, levels = rows.matrix, rows.difficulties
+            owned_mask = sum(1 << bit for bit in owned)
+            owned_words = np.array([(owned_mask >> (word * _WORD_BITS)) & _WORD_MASK
+                                    for word in range(matrix.shape[1])], dtype=np.uint64)
+            lacking = matrix[:count] & ~owned_words
+            missing = _popcount(lacking)
+            selected = missing <= max_missing
+            if wanted is not None:
+                selected &= levels[:count] == wanted
+            matches = np.flatnonzero(selected)
+            order = matches[np.lexsort((-matches, missing[matches]))][:limit]
+            results = [(rows.ids[i], _decode(rows.keys, int.from_bytes(lacking[i].tobytes(), "little")))
+                       for i in order.tolist()]
+            return results, len(matches)
+
+        owned_mask = sum(1 << bit for bit in owned)
+        matches = []
+        for i in range(count):
+            if wanted is not None and rows.difficulties[i] != wanted:
+                continue
+            lacking_mask = rows.rows[i] & ~owned_mask
+            missing_count = lacking_mask.bit_count()
+            if missing_count <= max_missing:
+                matches.append((missing_count, -i, lacking_mask))
+        matches.sort(key=lambda match: match[:2])
+        results = [(rows.ids[-negative_index], _decode(rows.keys, lacking_mask))
+                   for _, negative_index, lacking_mask in matches[:limit]]
+        return results, len(matches)
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._rows
+        return {
+            "ideas": rows.count,
+            "components": len(rows.keys),
+            "numpy": NUMPY_AVAILABLE,
+        }
+
+
+_byte_popcounts = None
+
+
+def _popcount(words):
+    """Set bits per row of a uint64 matrix"""
+    global _byte_popcounts
+    np = load_numpy()
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    # numpy < 2.0: look up each byte
+    if _byte_popcounts is None:
+        _byte_popcounts = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+    return _byte_popcounts[words.view(np.uint8)].reshape(len(words), -1).sum(axis=1, dtype=np.int64)
+
+
+def _decode(keys: List[str], mask: int) -> List[str]:
+    decoded = []
+    while mask:
+        low = mask & -mask
+        decoded.append(keys[low.bit_length() - 1])
+        mask ^= low
+    return decoded
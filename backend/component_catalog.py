@@ -0,0 +1,150 @@
+"""
+Component catalog
+In-memory component index with id, name, category and prefix-token lookups
+"""
+
+import heapq
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    return _TOKEN.findall(str(text).casefold())
+
+
+def normalize_name(name: Any) -> str:
+    return " ".join(str(name).split()).casefold()
+
+
+class _CatalogIndex:
+    """Immutable snapshot of the catalog and its lookup tables"""
+
+    def __init__(self, components: Iterable[Dict[str, Any]]):
+        # Later entries replace earlier ones with the same id
+        self.by_id: Dict[str, Dict[str, Any]] = {component["id"]: component for component in components}
+        self.components: List[Dict[str, Any]] = list(self.by_id.values())
+        self.by_category: Dict[str, List[Dict[str, Any]]] = {}
+        # Normalized name -> id; the first component with a name wins
+        self.by_name: Dict[str, str] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        # Postings of name words only, for ranking name matches first
+        self.name_postings: Dict[str, Set[str]] = {}
+
+        # Hot loop on large catalogs: bind lookups locally
+        findall = _TOKEN.findall
+        by_category = self.by_category
+        by_name = self.by_name
+        postings = self.postings
+        name_postings = self.name_postings
+        for component in self.components:
+            component_id = component["id"]
+            by_name.setdefault(normalize_name(component.get("name", "")), component_id)
+            category = str(component.get("category", "")).casefold()
+            if category in by_category:
+                by_category[category].append(component)
+            else:
+                by_category[category] = [component]
+            name_tokens = set(findall(str(component.get("name", "")).casefold()))
+            for token in name_tokens:
+                if token in name_postings:
+                    name_postings[token].add(component_id)
+                else:
+                    name_postings[token] = {component_id}
+            for token in name_tokens.union(findall(str(component.get("description", "")).casefold())):
+                if token in postings:
+                    postings[token].add(component_id)
+                else:
+                    postings[token] = {component_id}
+
+        self.sorted_tokens = sorted(self.postings)
+        self.sorted_name_tokens = sorted(self.name_postings)
+        # Position in name order, so ranking ties never compares strings per query
+        by_name_order = sorted(self.components, key=lambda component: str(component.get("name", "")).casefold())
+        self.name_rank: Dict[str, int] = {component["id"]: i for i, component in enumerate(by_name_order)}
+
+    def prefix_matches(self, prefix: str, names_only: bool = False) -> Set[str]:
+        """Ids of components with any token (or name token) starting with prefix"""
+        postings, tokens = ((self.name_postings, self.sorted_name_tokens) if names_only
+                            else (self.postings, self.sorted_tokens))
+        i = bisect_left(tokens, prefix)
+        end = i
+        while end < len(tokens) and tokens[end].startswith(prefix):
+            end += 1
+        return set().union(*(postings[token] for token in tokens[i:end]))
+
+
+class ComponentCatalog:
+    """Component catalog whose index is rebuilt off to the side and swapped in atomically"""
+
+    def __init__(self, components: Iterable[Dict[str, Any]] = ()):
+        self._index = _CatalogIndex(components)
+        self.version = 1
+
+    def load(self, components: Iterable[Dict[str, Any]]) -> None:
+        """Replace the catalog contents"""
+        index = _CatalogIndex(components)
+        self._index = index
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self._index.components)
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._index.components
+
+    def get(self, component_id: str):
+        return self._index.by_id.get(component_id)
+
+    def id_for_name(self, name: Any) -> Optional[str]:
+        """Id of the component with this name, ignoring case and extra whitespace"""
+        return self._index.by_name.get(normalize_name(name))
+
+    def by_category(self, category: str) -> List[Dict[str, Any]]:
+        return self._index.by_category.get(category.casefold(), [])
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Components matching every query token as a prefix of a name or description word.
+
+        Ranked by exact name match, then by how many tokens match the name,
+        then by name. Each rank tier is cut to the top `limit` with a heap and
+        later tiers are skipped once enough results are found.
+        """
+        index = self._index
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return []
+
+        matches = None
+        for term in terms:
+            term_matches = index.prefix_matches(term)
+            matches = term_matches if matches is None else matches & term_matches
+            if not matches:
+                return []
+
+        results: List[str] = []
+        taken: Set[str] = set()
+
+        def take(candidates: Set[str]) -> None:
+            wanted = limit - len(results)
+            if wanted > 0 and candidates:
+                best = heapq.nsmallest(wanted, candidates - taken, key=index.name_rank.__getitem__)
+                results.extend(best)
+                taken.update(best)
+
+        exact = index.by_name.get(normalize_name(query))
+        if exact in matches:
+            take({exact})
+        name_matches = [index.prefix_matches(term, names_only=True) & matches for term in terms]
+        in_name = set.intersection(*name_matches)
+        take(in_name)
+        if len(results) < limit and len(terms) > 1:
+            # Fewer than all tokens in the name: most name hits first
+            hits = Counter(component_id for found in name_matches for component_id in found - in_name)
+            for count in range(len(terms) - 1, 0, -1):
+                take({component_id for component_id, found in hits.items() if found == count})
+        take(matches)
+        return [index.by_id[component_id] for component_id in results]
@@ -0,0 +1,107 @@
+"""
+Component store
+JSON-lines file backing for the component catalog, with CSV/JSONL import
+"""
+
+import csv
+import io
+import json
+import logging
+import mmap
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REQUIRED_FIELDS = ("id", "name", "category")
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentImportError(ValueError):
+    """Raised when imported component data is malformed"""
+
+
+def normalize_component(raw: Dict[str, Any], line: Optional[int] = None) -> Dict[str, Any]:
+    """Validate required fields and coerce a raw record to the Component shape"""
+    where = f" (record {line})" if line is not None else ""
+    if not isinstance(raw, dict):
+        raise ComponentImportError(f"Component must be an object{where}")
+    missing = [field for field in REQUIRED_FIELDS if not str(raw.get(field) or "").strip()]
+    if missing:
+        raise ComponentImportError(f"Component missing {', '.join(missing)}{where}")
+
+    component = {key: value for key, value in raw.items() if value is not None}
+    for field in REQUIRED_FIELDS:
+        component[field] = str(raw[field]).strip()
+    component["description"] = str(raw.get("description") or "")
+    return component
+
+
+def parse_jsonl(text: str) -> List[Dict[str, Any]]:
+    components = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ComponentImportError(f"Invalid JSON on line {number}: {e.msg}")
+        components.append(normalize_component(raw, number))
+    return components
+
+
+def parse_csv(text: str) -> List[Dict[str, Any]]:
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or any(field not in reader.fieldnames for field in REQUIRED_FIELDS):
+        raise ComponentImportError(f"CSV header must include {', '.join(REQUIRED_FIELDS)}")
+    return [normalize_component(row, number) for number, row in enumerate(reader, start=2)]
+
+
+class ComponentStore:
+    """Components persisted as one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the backing file, used to detect changes"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read all components, memory-mapping the file instead of reading it into a string.
+
+        Malformed lines are logged and skipped, so one bad record can't stop the server from starting.
+        """
+        components = []
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return components
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for number, line in enumerate(iter(mapped.readline, b""), start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        components.append(normalize_component(json.loads(line), number))
+                    except (ValueError, UnicodeDecodeError) as e:
+                        logger.warning("Skipping component on line %d of %s: %s", number, self.path, e)
+        return components
+
+    def save(self, components: Iterable[Dict[str, Any]]) -> None:
+        """Atomically replace the file contents"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".components-", suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for component in components:
+                    f.write(json.dumps(component, ensure_ascii=False, separators=(",", ":")))
+                    f.write("\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,207 @@
+"""
+Pre-encoded response payloads
+JSON or MessagePack bodies encoded once per data version, with field projection, ETags and pre-compressed variants
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Accepted as requests for MessagePack; responses always use MSGPACK_MEDIA_TYPE
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Fields kept by every projection so clients can still fetch the full record
+ALWAYS_PROJECTED = ("id",)
+
+
+def dumps_bytes(data: Any) -> bytes:
+    """Encode data as compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode(data: Any, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Encode data as compact JSON, or MessagePack for MSGPACK_MEDIA_TYPE"""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(data, use_bin_type=True)
+    return dumps_bytes(data)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma-separated fields= parameter into a canonical tuple, or None for every field"""
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",")} - {""}
+    if not names:
+        return None
+    return tuple(sorted(names | set(ALWAYS_PROJECTED)))
+
+
+def _project_record(record: Any, fields: Iterable[str]) -> Any:
+    if not isinstance(record, dict):
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+
+def project(data: Any, fields: Optional[Tuple[str, ...]]) -> Any:
+    """Keep only the given fields of a record, a list of records, or the items of a page"""
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [_project_record(record, fields) for record in data]
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        return {**data, "items": [_project_record(record, fields) for record in data["items"]]}
+    return _project_record(data, fields)
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate_media_type(accept: str) -> str:
+    """MessagePack if the Accept header prefers it to JSON and msgpack is installed, JSON otherwise"""
+    if not MSGPACK_AVAILABLE or "msgpack" not in accept:
+        return JSON_MEDIA_TYPE
+    accepted = _accepted_encodings(accept)
+    msgpack_quality = max(accepted.get(alias, 0.0) for alias in _MSGPACK_ALIASES)
+    json_quality = accepted.get(JSON_MEDIA_TYPE, 0.0)
+    return MSGPACK_MEDIA_TYPE if msgpack_quality > 0 and msgpack_quality >= json_quality else JSON_MEDIA_TYPE
+
+
+def negotiated_response(request: Request, data: Any, fields: Optional[str] = None,
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """Project data onto fields and encode it in the format the client accepts"""
+    media_type = negotiate_media_type(request.headers.get("accept", ""))
+    body = encode(project(data, parse_fields(fields)), media_type)
+    return Response(content=body, media_type=media_type, headers={**(headers or {}), "Vary": "Accept"})
+
+
+class EncodedPayload:
+    """One JSON or MessagePack body with its identity, gzip and brotli representations"""
+
+    def __init__(self, body: bytes, version: int, min_compress_bytes: int, media_type: str = JSON_MEDIA_TYPE):
+        self.body = body
+        self.media_type = media_type
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.etag_base = f"v{version}-{digest}"
+        self._compress = len(body) >= min_compress_bytes
+        self._variants: Dict[str, bytes] = {}
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Strong validators must differ per content-coding
+        suffix = f"-{encoding}" if encoding else ""
+        return f'"{self.etag_base}{suffix}"'
+
+    def matched_etag(self, if_none_match: str) -> Optional[str]:
+        """The ETag of whichever representation If-None-Match names, or None"""
+        if if_none_match.strip() == "*":
+            return self.etag()
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        tags |= {tag[2:] for tag in tags if tag.startswith("W/")}
+        for encoding in (None, "gzip", "br"):
+            if self.etag(encoding) in tags:
+                return self.etag(encoding)
+        return None
+
+    def variant(self, accept_encoding: str) -> Tuple[Optional[str], bytes]:
+        """Pick the best representation for an Accept-Encoding header"""
+        if not self._compress:
+            return None, self.body
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in (("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)):
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                if encoding not in self._variants:
+                    if encoding == "br":
+                        self._variants[encoding] = brotli.compress(self.body)
+                    else:
+                        self._variants[encoding] = gzip.compress(self.body, compresslevel=6, mtime=0)
+                return encoding, self._variants[encoding]
+        return None, self.body
+
+
+class PayloadCache:
+    """LRU of encoded payloads, invalidated wholesale when the data version changes"""
+
+    def __init__(self, max_entries: int = 4096, max_age: int = 60, min_compress_bytes: int = 1024):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.min_compress_bytes = min_compress_bytes
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, EncodedPayload]" = OrderedDict()
+
+    def get(self, version: int, key: Hashable, build: Callable[[], Any],
+            fields: Optional[Tuple[str, ...]] = None, media_type: str = JSON_MEDIA_TYPE) -> EncodedPayload:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        key = (key, fields, media_type)
+        payload = self._entries.get(key)
+        if payload is None:
+            # Project before encoding, so dropped fields are never serialized
+            body = encode(project(build(), fields), media_type)
+            payload = EncodedPayload(body, version, self.min_compress_bytes, media_type)
+            self._entries[key] = payload
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return payload
+
+    def respond(self, request: Request, version: int, key: Hashable, build: Callable[[], Any],
+                fields: Optional[str] = None) -> Response:
+        """Serve a cached payload in the negotiated format, answering conditional requests with 304"""
+        media_type = negotiate_media_type(request.headers.get("accept", ""))
+        payload = self.get(version, key, build, parse_fields(fields), media_type)
+        headers = {
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate",
+            "Vary": "Accept, Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        matched = payload.matched_etag(if_none_match) if if_none_match else None
+        if matched:
+            headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+
+        encoding, body = payload.variant(request.headers.get("accept-encoding", ""))
+        headers["ETag"] = payload.etag(encoding)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=payload.media_type, headers=headers)
@@ -0,0 +1,71 @@
+"""
+Fan-out generation helpers
+Split large idea requests into smaller concurrent LLM calls and merge the results
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Dict, List
+
+# Rotated across shards so parallel calls don't converge on the same ideas
+DIVERSITY_HINTS = [
+    "everyday problems at home or school",
+    "environment, energy and sustainability",
+    "health, safety and accessibility",
+    "automation and smart control",
+    "data logging, monitoring and alerts",
+    "games, art and interactive learning",
+    "agriculture and outdoor use",
+    "community and public services",
+]
+
+_TITLE_STOPWORDS = {"a", "an", "the", "and", "or", "of", "for", "with", "using", "based", "to", "in", "on"}
+
+
+def shard_focus(index: int) -> str:
+    """Diversity hint for a shard; past the last hint they repeat with a round number so prompts stay distinct"""
+    hint = DIVERSITY_HINTS[index % len(DIVERSITY_HINTS)]
+    rounds = index // len(DIVERSITY_HINTS)
+    return hint if rounds == 0 else f"{hint}, less obvious angle #{rounds + 1}"
+
+
+def plan_shards(count: int, shard_size: int) -> List[int]:
+    """Split count into near-equal shard sizes no larger than shard_size"""
+    if count <= 0:
+        return []
+    shards = -(-count // max(1, shard_size))
+    base, extra = divmod(count, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def _title_tokens(title: Any) -> frozenset:
+    words = re.findall(r"[a-z0-9]+", str(title).casefold())
+    return frozenset(word for word in words if word not in _TITLE_STOPWORDS)
+
+
+class ProjectDeduper:
+    """Reject projects whose titles closely match one already accepted"""
+
+    def __init__(self, threshold: float = 0.75):
+        self.threshold = threshold
+        self._seen: List[frozenset] = []
+
+    def accept(self, project: Dict[str, Any]) -> bool:
+        tokens = _title_tokens(project.get("title", ""))
+        if tokens:
+            for seen in self._seen:
+                if len(tokens & seen) / len(tokens | seen) >= self.threshold:
+                    return False
+            self._seen.append(tokens)
+        return True
+
+
+async def gather_bounded(awaitables: List[Awaitable], concurrency: int) -> List[Any]:
+    """Await all items with at most `concurrency` running at once; exceptions are returned"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(a) for a in awaitables), return_exceptions=True)
@@ -0,0 +1,144 @@
+"""
+Idea response cache
+Content-addressed LRU cache with TTL for generated project ideas
+"""
+
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Preference keys that influence the generation prompt, with the defaults
+# generate_ideas falls back to. Anything else in preferences is ignored.
+PREFERENCE_DEFAULTS = {
+    "theme": "General",
+    "skillLevel": "Beginner",
+    "count": 5,
+    "duration": "1-2 hours",
+    "teamSize": "Individual",
+}
+
+
+def _normalize_text(value: Any) -> str:
+    return " ".join(str(value).split()).casefold()
+
+
+def normalize_preferences(preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply defaults and normalize the preferences that affect the prompt"""
+    normalized = {}
+    for key, default in PREFERENCE_DEFAULTS.items():
+        value = preferences.get(key, default)
+        if key == "count":
+            try:
+                normalized[key] = int(value)
+            except (TypeError, ValueError):
+                normalized[key] = _normalize_text(value)
+        else:
+            normalized[key] = _normalize_text(value)
+    return normalized
+
+
+def make_cache_key(component_names: List[str], preferences: Dict[str, Any], model_id: str) -> str:
+    """Canonical hash of a generation request"""
+    canonical = {
+        "components": sorted(_normalize_text(name) for name in component_names),
+        "preferences": normalize_preferences(preferences),
+        "model_id": _normalize_text(model_id),
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class IdeaCache:
+    """LRU cache bounded by entry count and encoded size, with per-entry TTL"""
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size_in_bytes, ideas)
+        self._entries: "OrderedDict[str, tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached ideas for key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, ideas = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(ideas)
+
+    def ttl_remaining(self, key: str) -> Optional[float]:
+        """Seconds until key expires, or None if it isn't cached; doesn't count as a lookup"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def set(self, key: str, ideas: List[Dict[str, Any]]) -> None:
+        """Store ideas under key, evicting least recently used entries as needed"""
+        if not self.enabled:
+            return
+
+        size = len(json.dumps(ideas, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, copy.deepcopy(ideas))
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,236 @@
+"""
+LLM response parsing
+Incremental extraction of project objects from the model's JSON output
+"""
+
+import json
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+_PROJECTS_ARRAY = re.compile(r'"projects"\s*:\s*\[')
+_FENCE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)(?:```|$)", re.S)
+
+# IdeaResponse fields the model is asked to fill in
+TEXT_FIELDS = ("title", "description", "problem_statement", "working_principle", "difficulty", "estimated_cost")
+LIST_FIELDS = ("components", "innovation_elements", "scalability_options", "learning_outcomes", "tags")
+
+
+class ProjectParseError(ValueError):
+    """Raised when no usable project can be recovered from a response"""
+
+
+class ParsedProjects(NamedTuple):
+    projects: List[Dict[str, Any]]
+    salvaged: int  # projects recovered from malformed or truncated output
+    dropped: int  # elements that were not valid projects
+    truncated: bool
+
+
+class ProjectStreamParser:
+    """Incrementally detect completed elements of the top-level "projects" array.
+
+    Feed raw text chunks as they arrive; each call returns the project objects
+    whose closing brace was seen in that chunk. Only the brace/string state is
+    tracked, so every character is scanned once regardless of chunk size.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self.finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+        self.emitted = 0
+        self.skipped = 0
+
+    @property
+    def found_array(self) -> bool:
+        """Whether the start of the projects array has been seen"""
+        return self._in_array
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk and return the projects completed by it"""
+        if self.finished or not chunk:
+            return []
+        self._buffer += chunk
+
+        if not self._in_array:
+            match = _PROJECTS_ARRAY.search(self._buffer, self._pos)
+            if match is None:
+                # Keep enough tail to match the key across a chunk boundary
+                self._buffer = self._buffer[-32:]
+                self._pos = 0
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        return self._scan()
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        projects = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    if char == "]":
+                        self.finished = True
+                        i += 1
+                        break
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        project = self._decode(buffer[self._object_start:i + 1])
+                        if project is not None:
+                            projects.append(project)
+                        self._object_start = -1
+            i += 1
+
+        # Drop text that can no longer be part of an object
+        if self._object_start >= 0:
+            self._buffer = buffer[self._object_start:]
+            self._object_start = 0
+            self._pos = i - (len(buffer) - len(self._buffer))
+        else:
+            self._buffer = ""
+            self._pos = 0
+        return projects
+
+    def _decode(self, text: str):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            self.skipped += 1
+            return None
+        if not isinstance(value, dict):
+            self.skipped += 1
+            return None
+        self.emitted += 1
+        return value
+
+
+def normalize_project(raw: Any) -> Optional[Dict[str, Any]]:
+    """Coerce a parsed element to the IdeaResponse field types, or None if unusable.
+
+    Missing or null fields are left out so callers can apply their defaults.
+    """
+    if not isinstance(raw, dict):
+        return None
+    project: Dict[str, Any] = {}
+    for field in TEXT_FIELDS:
+        value = raw.get(field)
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(item) for item in value)
+        value = str(value).strip()
+        if value:
+            project[field] = value
+    for field in LIST_FIELDS:
+        value = raw.get(field)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = [part.strip() for part in value.split(",")]
+        elif not isinstance(value, (list, tuple)):
+            value = [value]
+        project[field] = [str(item).strip() for item in value if item is not None and str(item).strip()]
+    if "title" not in project and "description" not in project:
+        return None
+    return project
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _outermost_json(text: str) -> Any:
+    """Decode the first top-level object or array, ignoring surrounding prose"""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON value found")
+    start = min(starts)
+    closer = "}" if text[start] == "{" else "]"
+    end = text.rfind(closer)
+    if end < start:
+        raise ValueError("unterminated JSON value")
+    return json.loads(text[start:end + 1])
+
+
+def _projects_list(text: str) -> List[Any]:
+    value = _outermost_json(text)
+    elements = value.get("projects") if isinstance(value, dict) else value
+    if not isinstance(elements, list):
+        raise ValueError("no projects list")
+    return elements
+
+
+def _salvage(text: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Every fully-formed project in malformed or truncated output, and whether it was cut off"""
+    parser = ProjectStreamParser()
+    elements = parser.feed(text)
+    if not parser.found_array:
+        # Bare list of projects without the wrapping object
+        parser = ProjectStreamParser()
+        elements = parser.feed('"projects": ' + text[text.find("["):]) if "[" in text else []
+    return elements, not parser.finished
+
+
+def parse_projects(text: str) -> ParsedProjects:
+    """Extract valid projects from a raw LLM response.
+
+    Handles markdown fences and surrounding prose, and falls back to
+    recovering every fully-formed project when the JSON is malformed or
+    truncated. The raw text is tried before fences are stripped, since
+    project fields may themselves contain fenced code.
+    """
+    text = text or ""
+    fenced = _strip_fences(text)
+    candidates = [text] if fenced == text else [text, fenced]
+    elements = None
+    for body in candidates:
+        try:
+            elements = _projects_list(body)
+            break
+        except ValueError:
+            continue
+    if elements is not None:
+        salvaged = 0
+        truncated = False
+    else:
+        for body in candidates:
+            elements, truncated = _salvage(body)
+            if elements:
+                break
+        salvaged = len(elements)
+
+    projects = []
+    for element in elements:
+        project = normalize_project(element)
+        if project is not None:
+            projects.append(project)
+    dropped = len(elements) - len(projects)
+    if salvaged:
+        salvaged -= dropped
+
+    if not projects:
+        raise ProjectParseError("No valid projects found in AI response")
+    return ParsedProjects(projects, salvaged, dropped, truncated)
@@ -0,0 +1,191 @@
+"""
+Idea store
+SQLite persistence for generated ideas with an FTS5 search index and running aggregates
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ideas (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    difficulty TEXT,
+    generated_by TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ideas_difficulty ON ideas (difficulty, rowid);
+CREATE VIRTUAL TABLE IF NOT EXISTS ideas_fts USING fts5 (
+    title, description, tags, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS idea_stats (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+);
+CREATE INDEX IF NOT EXISTS idea_stats_count ON idea_stats (dimension, count);
+"""
+
+# bm25 column weights for title, description, tags
+_RANK = "bm25(ideas_fts, 10.0, 2.0, 5.0)"
+
+_SEARCH_TERM = re.compile(r"[^\W_]+")
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query where every word must match as a prefix"""
+    terms = _SEARCH_TERM.findall(text.casefold())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class IdeaStore:
+    """Thread-safe SQLite idea store; call from worker threads, not the event loop"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add_many(self, ideas: Iterable[Dict[str, Any]]) -> int:
+        """Insert ideas not already stored; returns how many were added"""
+        added = 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for idea in ideas:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO ideas (id, difficulty, generated_by, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                        (idea["id"], idea.get("difficulty"), idea.get("generated_by"), idea.get("created_at"),
+                         json.dumps(idea, ensure_ascii=False)),
+                    )
+                    if cursor.rowcount == 0:
+                        continue
+                    conn.execute(
+                        "INSERT INTO ideas_fts (rowid, title, description, tags) VALUES (?, ?, ?, ?)",
+                        (cursor.lastrowid, idea.get("title", ""), idea.get("description", ""),
+                         " ".join(str(tag) for tag in idea.get("tags", []))),
+                    )
+                    self._bump(conn, idea)
+                    added += 1
+        return added
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, idea: Dict[str, Any]) -> None:
+        dimensions = [("total", ""), ("difficulty", str(idea.get("difficulty", ""))),
+                      ("generated_by", str(idea.get("generated_by", "")))]
+        dimensions += [("tag", str(tag)) for tag in set(idea.get("tags", []))]
+        conn.executemany(
+            "INSERT INTO idea_stats (dimension, value, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1",
+            dimensions,
+        )
+
+    def get(self, idea_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute("SELECT data FROM ideas WHERE id = ?", (idea_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, idea_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Ideas by id; ids that aren't stored are left out"""
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            conn = self._connection()
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(idea_ids), 500):
+                chunk = idea_ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT id, data FROM ideas WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((idea_id, json.loads(data)) for idea_id, data in rows)
+        return found
+
+    def components_since(self, after_rowid: int = 0) -> List[Tuple[int, str, Optional[str], List[str]]]:
+        """(rowid, id, difficulty, component names) of ideas stored after after_rowid, oldest first"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT rowid, id, difficulty, json_extract(data, '$.components') FROM ideas "
+                "WHERE rowid > ? ORDER BY rowid",
+                (after_rowid,),
+            ).fetchall()
+        return [(rowid, idea_id, difficulty, json.loads(components) if components else [])
+                for rowid, idea_id, difficulty, components in rows]
+
+    def list(self, limit: int = 20, cursor: Optional[int] = None,
+             difficulty: Optional[str] = None) -> Dict[str, Any]:
+        """Newest-first page of ideas using keyset pagination on rowid"""
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append("rowid < ?")
+            params.append(cursor)
+        if difficulty:
+            clauses.append("difficulty = ?")
+            params.append(difficulty)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT rowid, data FROM ideas {where} ORDER BY rowid DESC LIMIT ?", (*params, limit + 1)
+            ).fetchall()
+        items = [json.loads(data) for _, data in rows[:limit]]
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def search(self, text: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Ranked full-text search over title, description and tags"""
+        query = fts_query(text)
+        if query is None:
+            return {"items": [], "next_offset": None}
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT ideas.data, {_RANK} AS score FROM ideas_fts "
+                "JOIN ideas ON ideas.rowid = ideas_fts.rowid "
+                "WHERE ideas_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+                (query, limit + 1, offset),
+            ).fetchall()
+        items = [json.loads(data) for data, _ in rows[:limit]]
+        return {"items": items, "next_offset": offset + limit if len(rows) > limit else None}
+
+    def stats(self, top_tags: int = 20) -> Dict[str, Any]:
+        """Aggregates maintained on insert; cost is independent of the number of ideas"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT dimension, value, count FROM idea_stats WHERE dimension != 'tag' "
+                "UNION ALL SELECT * FROM (SELECT dimension, value, count FROM idea_stats "
+                "WHERE dimension = 'tag' ORDER BY count DESC LIMIT ?)",
+                (top_tags,),
+            ).fetchall()
+        stats: Dict[str, Any] = {"total": 0, "by_difficulty": {}, "by_model": {}, "top_tags": []}
+        for dimension, value, count in rows:
+            if dimension == "total":
+                stats["total"] = count
+            elif dimension == "difficulty":
+                stats["by_difficulty"][value] = count
+            elif dimension == "generated_by":
+                stats["by_model"][value] = count
+            else:
+                stats["top_tags"].append({"tag": value, "count": count})
+        return stats
@@ -0,0 +1,161 @@
+"""
+Background job queue
+Bounded in-process worker pool with TTL-retained job results for polling
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        # Monotonic time after which a finished job is forgotten
+        self.expires_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Run submitted payloads through handler on a fixed number of asyncio workers.
+
+    Jobs live in process memory: with several server processes, polling must
+    reach the process that accepted the job.
+    """
+
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]], workers: int = 4,
+                 max_pending: int = 1000, ttl_seconds: float = 3600):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        # Finished job ids in completion order, for expiry
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: Any) -> Job:
+        """Queue payload and return its job immediately"""
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+        self._expire()
+        job = Job(payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.max_pending} jobs already pending")
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """Approximate number of jobs queued ahead of job"""
+        if job.status != "queued" or self._queue is None:
+            return None
+        for index, queued in enumerate(self._queue._queue):
+            if queued is job:
+                return index
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.now().isoformat()
+            self.running += 1
+            try:
+                job.result = await self.handler(job.payload)
+                job.status = "succeeded"
+                self.succeeded += 1
+            except asyncio.CancelledError:
+                self._fail(job, 503, "Server shutting down")
+                raise
+            except Exception as e:
+                # HTTPException-like errors keep their status and detail
+                self._fail(job, getattr(e, "status_code", 500), getattr(e, "detail", None) or str(e))
+            finally:
+                self.running -= 1
+                self._finish(job)
+                self._queue.task_done()
+
+    def _fail(self, job: Job, status_code: int, detail: Any) -> None:
+        job.status = "failed"
+        job.error = {"status_code": status_code, "detail": detail}
+        self.failed += 1
+
+    def _finish(self, job: Job) -> None:
+        job.finished_at = datetime.now().isoformat()
+        job.expires_at = time.monotonic() + self.ttl_seconds
+        # The payload is no longer needed once the job has run
+        job.payload = None
+        self._finished[job.id] = None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._finished:
+            job_id = next(iter(self._finished))
+            if self._jobs[job_id].expires_at > now:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return {
+            "workers": self.workers,
+            "queued": queued,
+            "running": self.running,
+            "retained": len(self._jobs),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
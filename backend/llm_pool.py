@@ -0,0 +1,73 @@
+"""
+LLM session pool
+Hands each request its own chat client instead of sharing one global conversation
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+
+class LlmSessionPool:
+    """Bounded pool of chat clients with a per-client turn limit.
+
+    A client is recycled after max_turns exchanges, so its conversation history
+    never grows past that bound. With max_turns=1 (the default) every request
+    starts from a fresh session containing only the system message.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], size: int = 16, max_turns: int = 1,
+                 session_prefix: str = "atal_idea_generator"):
+        if size < 1:
+            raise ValueError("LLM session pool size must be at least 1")
+        self._factory = factory
+        self.size = size
+        self.max_turns = max(1, max_turns)
+        self.session_prefix = session_prefix
+        self._idle: List[Tuple[Any, int]] = []
+        self._semaphore = asyncio.Semaphore(size)
+        self.in_use = 0
+        self.created = 0
+        self.discarded = 0
+
+    def _new_client(self) -> Any:
+        self.created += 1
+        return self._factory(f"{self.session_prefix}_{uuid.uuid4().hex}")
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """Borrow a chat client for one exchange"""
+        async with self._semaphore:
+            client, turns = self._idle.pop() if self._idle else (self._new_client(), 0)
+            self.in_use += 1
+            try:
+                yield client
+            except BaseException:
+                # A failed exchange may leave half-written history behind
+                self.discarded += 1
+                raise
+            else:
+                turns += 1
+                if turns < self.max_turns:
+                    self._idle.append((client, turns))
+            finally:
+                self.in_use -= 1
+
+    def prefill(self, count: int) -> int:
+        """Create up to count idle clients ahead of demand; returns how many were added"""
+        added = 0
+        while len(self._idle) + self.in_use < min(count, self.size):
+            self._idle.append((self._new_client(), 0))
+            added += 1
+        return added
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "max_turns": self.max_turns,
+            "in_use": self.in_use,
+            "idle": len(self._idle),
+            "created": self.created,
+            "discarded": self.discarded,
+        }
@@ -0,0 +1,255 @@
+"""
+Upstream LLM client wrapper
+Concurrency limits, deadline propagation, retry with jittered backoff and a circuit breaker
+"""
+
+import asyncio
+import random
+import re
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from rate_limit import FairScheduler
+
+T = TypeVar("T")
+
+# Absolute monotonic deadline for the current request, inherited by tasks it spawns
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+_RETRYABLE_MESSAGE = re.compile(
+    r"\b(408|425|429|500|502|503|504|529)\b|rate.?limit|timed? ?out|temporar|overloaded|unavailable|connection",
+    re.IGNORECASE,
+)
+
+
+class UpstreamError(Exception):
+    """Base class for failures raised by the upstream wrapper itself"""
+
+
+class CircuitOpenError(UpstreamError):
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM provider unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(UpstreamError):
+    pass
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound all upstream calls in this context; nested deadlines can only shorten it"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    current = _deadline.get()
+    new = time.monotonic() + seconds
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, UpstreamError):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if isinstance(status, int):
+        return status in (408, 425, 429, 529) or status >= 500
+    return bool(_RETRYABLE_MESSAGE.search(str(error)))
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_timeout one trial call is let through"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        if self.state == "closed" or self.failure_threshold <= 0:
+            return
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == "open" and elapsed >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise CircuitOpenError(max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or (self.failure_threshold > 0 and self.failures >= self.failure_threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Give up a half-open trial without a verdict (e.g. the caller was cancelled)"""
+        self._trial_in_flight = False
+
+
+class UpstreamClient:
+    """Wraps upstream LLM calls with limits, deadlines, retries and a circuit breaker"""
+
+    def __init__(self, max_concurrency: int = 32, per_model_concurrency: int = 16, max_attempts: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 8.0, attempt_timeout: float = 60.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.per_model_concurrency = per_model_concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Slots go round-robin across clients so one client can't starve the rest
+        self._global = FairScheduler(max_concurrency)
+        self._per_model: Dict[str, FairScheduler] = {}
+        self.retries = 0
+        self.in_flight = 0
+
+    def _model_scheduler(self, model: str) -> FairScheduler:
+        scheduler = self._per_model.get(model)
+        if scheduler is None:
+            scheduler = self._per_model[model] = FairScheduler(self.per_model_concurrency)
+        return scheduler
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """Circuit breaker for one model, so an outage of one provider doesn't block the others"""
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def available(self, model: str) -> bool:
+        """False while the model's circuit is open and not yet due for a trial call"""
+        breaker = self._breakers.get(model)
+        return (breaker is None or breaker.state != "open"
+                or time.monotonic() - breaker.opened_at >= breaker.reset_timeout)
+
+    def _attempt_budget(self) -> float:
+        remaining = remaining_time()
+        if remaining is None:
+            return self.attempt_timeout
+        if remaining <= 0:
+            raise DeadlineExceededError("Request deadline exceeded before calling the LLM provider")
+        return min(self.attempt_timeout, remaining)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform over [0, capped exponential]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    async def call(self, model: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn under the limits, retrying retryable failures until the deadline"""
+        breaker = self.breaker(model)
+        attempt = 0
+        while True:
+            attempt += 1
+            # Check the deadline before taking a half-open trial slot, which only a verdict or release frees
+            self._attempt_budget()
+            breaker.before_call()
+            try:
+                async with self.limit(model):
+                    # Time spent queueing for a slot comes out of the deadline
+                    result = await asyncio.wait_for(fn(), self._attempt_budget())
+            except asyncio.CancelledError:
+                breaker.release_trial()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.release_trial()
+                remaining = remaining_time()
+                if isinstance(e, asyncio.TimeoutError) and remaining is not None and remaining <= 0:
+                    raise DeadlineExceededError("Request deadline exceeded waiting for the LLM provider") from e
+                if not retryable or attempt >= self.max_attempts:
+                    raise
+                delay = self._backoff(attempt)
+                if remaining is not None and delay >= remaining:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    async def _acquire(self, slots: AsyncExitStack, model: str) -> None:
+        # Queue at the tighter limit first: calls waiting for one slot while holding the other
+        # would let a client flooding the queue fill the held slots and jump ahead of the rest
+        for scheduler in sorted((self._model_scheduler(model), self._global), key=lambda s: s.capacity):
+            await slots.enter_async_context(scheduler.slot())
+
+    @asynccontextmanager
+    async def limit(self, model: str) -> AsyncIterator[None]:
+        """Hold a global and a per-model slot, each shared fairly between clients.
+
+        Waiting for the slots is bounded by the request deadline.
+        """
+        async with AsyncExitStack() as slots:
+            try:
+                await asyncio.wait_for(self._acquire(slots, model), remaining_time())
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError("Request deadline exceeded waiting for an LLM slot") from None
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    @asynccontextmanager
+    async def stream_slot(self, model: str) -> AsyncIterator[None]:
+        """Limits and circuit breaking for a streamed call, which cannot be retried once started"""
+        breaker = self.breaker(model)
+        breaker.before_call()
+        try:
+            async with self.limit(model):
+                yield
+        except asyncio.CancelledError:
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.release_trial()
+            raise
+        else:
+            breaker.record_success()
+
+    @property
+    def waiting(self) -> int:
+        """Calls queued for a global or per-model slot"""
+        return self._global.waiting + sum(scheduler.waiting for scheduler in self._per_model.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "retries": self.retries,
+            "waiting": self.waiting,
+            "queue": self._global.stats(),
+            "model_queues": {model: scheduler.stats() for model, scheduler in self._per_model.items()},
+            "circuits": {model: breaker.state for model, breaker in self._breakers.items()},
+        }
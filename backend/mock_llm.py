@@ -0,0 +1,108 @@
+"""
+Mock LLM backend
+Deterministic stand-in for emergentintegrations' LlmChat, for offline benchmarks and development
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from collections import Counter
+from typing import AsyncIterator, List
+
+_COUNT = re.compile(r"create (\d+)", re.IGNORECASE)
+
+# Calls made so far per prompt digest, shared by every session in the process
+_attempts: Counter = Counter()
+
+
+class MockLlmError(RuntimeError):
+    """Simulated upstream failure"""
+
+
+class UserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class MockLlmChat:
+    """Mimics LlmChat with configurable latency, token rate and failure rate.
+
+    Settings come from the environment so a server started with
+    LLM_BACKEND=mock can be tuned without code changes:
+    MOCK_LLM_LATENCY_MS, MOCK_LLM_TOKENS_PER_SECOND, MOCK_LLM_FAILURE_RATE
+    and MOCK_LLM_SEED. Whether a call fails depends only on the seed, the
+    prompt and how many times that prompt was sent before, so runs are
+    reproducible however sessions are pooled or calls interleave.
+    """
+
+    def __init__(self, api_key: str = "mock", session_id: str = "mock", system_message: str = ""):
+        self.session_id = session_id
+        self.system_message = system_message
+        self.provider = "mock"
+        self.model = "mock"
+        self.latency = float(os.environ.get("MOCK_LLM_LATENCY_MS", "200")) / 1000
+        self.tokens_per_second = float(os.environ.get("MOCK_LLM_TOKENS_PER_SECOND", "0"))
+        self.failure_rate = float(os.environ.get("MOCK_LLM_FAILURE_RATE", "0"))
+        self.seed = os.environ.get("MOCK_LLM_SEED", "0")
+
+    def with_model(self, provider: str, model: str) -> "MockLlmChat":
+        self.provider = provider
+        self.model = model
+        return self
+
+    def _respond(self, prompt: str) -> str:
+        match = _COUNT.search(prompt)
+        count = int(match.group(1)) if match else 1
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        projects = [
+            {
+                "title": f"Mock Project {digest[i * 6:i * 6 + 6]} {i + 1}",
+                "description": "A deterministic mock project used for benchmarking the generation path.",
+                "problem_statement": "Measures server overhead without a real model.",
+                "working_principle": "The mock backend echoes a fixed structure after a simulated delay.",
+                "components": ["Arduino Uno", "LED"],
+                "difficulty": "Beginner",
+                "estimated_cost": "₹500-1000",
+                "innovation_elements": ["repeatable"],
+                "scalability_options": ["more load"],
+                "learning_outcomes": ["benchmarking"],
+                "tags": ["mock", "benchmark"],
+            }
+            for i in range(count)
+        ]
+        return json.dumps({"projects": projects}, ensure_ascii=False)
+
+    def _chunks(self, text: str) -> List[str]:
+        # Roughly four characters per token
+        return [text[i:i + 16] for i in range(0, len(text), 16)]
+
+    def _maybe_fail(self, prompt: str) -> None:
+        if not self.failure_rate:
+            return
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        attempt = _attempts[digest]
+        _attempts[digest] += 1
+        if random.Random(f"{self.seed}:{digest}:{attempt}").random() < self.failure_rate:
+            raise MockLlmError("Simulated upstream failure (503)")
+
+    async def send_message(self, user_message: UserMessage) -> str:
+        text = self._respond(user_message.text)
+        delay = self.latency
+        if self.tokens_per_second > 0:
+            delay += len(text) / 4 / self.tokens_per_second
+        await asyncio.sleep(delay)
+        self._maybe_fail(user_message.text)
+        return text
+
+    async def stream_message(self, user_message: UserMessage) -> AsyncIterator[str]:
+        text = self._respond(user_message.text)
+        await asyncio.sleep(self.latency)
+        self._maybe_fail(user_message.text)
+        chunk_delay = 4 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for chunk in self._chunks(text):
+            if chunk_delay:
+                await asyncio.sleep(chunk_delay)
+            yield chunk
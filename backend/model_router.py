@@ -0,0 +1,193 @@
+"""
+Model router
+Per-model session pools, rolling health tracking and latency-aware model selection
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from llm_pool import LlmSessionPool
+
+AUTO_MODEL = "auto"
+
+# model_id -> (provider, provider model name) for the models the frontend offers
+KNOWN_MODELS: Dict[str, Tuple[str, str]] = {
+    "gpt-4o-mini": ("openai", "gpt-4o-mini"),
+    "gpt-4o": ("openai", "gpt-4o"),
+    "claude-3-7-sonnet-20250219": ("anthropic", "claude-3-7-sonnet-20250219"),
+    "gemini-2.0-flash": ("gemini", "gemini-2.0-flash"),
+}
+
+# Failover targets of similar cost for the known models
+DEFAULT_FAILOVER = ("gpt-4o-mini=gemini-2.0-flash,gemini-2.0-flash=gpt-4o-mini,"
+                    "gpt-4o=claude-3-7-sonnet-20250219,claude-3-7-sonnet-20250219=gpt-4o")
+
+# Vendor prefixes used in OpenRouter-style ids such as "openai/gpt-4o"
+PROVIDER_ALIASES = {"openai": "openai", "anthropic": "anthropic", "google": "gemini", "gemini": "gemini"}
+
+
+class UnknownModelError(ValueError):
+    pass
+
+
+def parse_model_specs(specs: str) -> Dict[str, Tuple[str, str]]:
+    """Parse "gpt-4o-mini,anthropic:claude-3-5-haiku" into model_id -> (provider, model)"""
+    models = {}
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        if ":" in spec:
+            provider, model = spec.split(":", 1)
+            models[model] = (PROVIDER_ALIASES.get(provider.lower(), provider.lower()), model)
+        elif spec in KNOWN_MODELS:
+            models[spec] = KNOWN_MODELS[spec]
+        else:
+            raise UnknownModelError(f"Unknown model {spec!r}; use provider:model for models not in KNOWN_MODELS")
+    return models
+
+
+def parse_failover(specs: str) -> Dict[str, List[str]]:
+    """Parse "gpt-4o-mini=gemini-2.0-flash|gpt-4o,gpt-4o=claude-3-7-sonnet-20250219" into model_id -> fallbacks"""
+    failover: Dict[str, List[str]] = {}
+    for spec in specs.split(","):
+        model_id, _, targets = spec.partition("=")
+        if model_id.strip() and targets.strip():
+            failover[model_id.strip()] = [target.strip() for target in targets.split("|") if target.strip()]
+    return failover
+
+
+class ModelHealth:
+    """Latency and error rate over the most recent calls to one model"""
+
+    def __init__(self, window: int = 50):
+        # (latency_seconds, succeeded)
+        self._calls: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self.last_failure: Optional[float] = None
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._calls.append((latency, ok))
+        if not ok:
+            self.last_failure = time.monotonic()
+
+    @property
+    def samples(self) -> int:
+        return len(self._calls)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        latencies = [latency for latency, ok in self._calls if ok]
+        return sum(latencies) / len(latencies) if latencies else None
+
+
+class ModelRouter:
+    """Routes requests to per-model session pools.
+
+    An explicit model_id is tried first, then the fallbacks configured for it
+    in failover (model_id -> model ids, usually of similar cost), healthy ones
+    first. Models without an entry don't fail over. "auto" ranks healthy
+    models by mean latency; models with fewer than min_samples calls rank
+    first in configuration order so each one gets measured.
+    """
+
+    def __init__(self, chat_factory: Callable[[str, str, str], Any], models: Dict[str, Tuple[str, str]],
+                 default_model: str, pool_size: int = 16, max_turns: int = 1,
+                 failover: Optional[Dict[str, List[str]]] = None,
+                 window: int = 50, min_samples: int = 5, max_error_rate: float = 0.5):
+        if not models:
+            raise ValueError("At least one model must be configured")
+        self._chat_factory = chat_factory
+        self.models = dict(models)
+        self.default_model = default_model if default_model in self.models else next(iter(self.models))
+        self.pool_size = pool_size
+        self.max_turns = max_turns
+        self.failover = {
+            model_id: [target for target in targets if target in self.models and target != model_id]
+            for model_id, targets in (failover or {}).items() if model_id in self.models
+        }
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._pools: Dict[str, LlmSessionPool] = {}
+        self._health = {model_id: ModelHealth(window) for model_id in self.models}
+
+    def resolve(self, model_id: Optional[str]) -> str:
+        """Canonical configured model id for a requested one, or AUTO_MODEL"""
+        if not model_id:
+            return self.default_model
+        if model_id == AUTO_MODEL or model_id in self.models:
+            return model_id
+        if "/" in model_id:
+            _, name = model_id.split("/", 1)
+            if name in self.models:
+                return name
+        raise UnknownModelError(f"Model {model_id!r} is not available; choose one of: {', '.join(self.available_ids())}")
+
+    def available_ids(self) -> List[str]:
+        return [AUTO_MODEL, *self.models]
+
+    def pool(self, model_id: str) -> LlmSessionPool:
+        pool = self._pools.get(model_id)
+        if pool is None:
+            provider, model = self.models[model_id]
+            pool = self._pools[model_id] = LlmSessionPool(
+                lambda session_id: self._chat_factory(provider, model, session_id),
+                size=self.pool_size,
+                max_turns=self.max_turns,
+            )
+        return pool
+
+    def healthy(self, model_id: str) -> bool:
+        health = self._health[model_id]
+        return health.samples < self.min_samples or health.error_rate < self.max_error_rate
+
+    def _score(self, model_id: str) -> float:
+        health = self._health[model_id]
+        if health.samples < self.min_samples or health.mean_latency is None:
+            return 0.0
+        return health.mean_latency
+
+    def candidates(self, model_id: Optional[str], available: Callable[[str], bool] = lambda _: True) -> List[str]:
+        """Models to try in order for a request"""
+        requested = self.resolve(model_id)
+        usable = [m for m in self.models if available(m) and self.healthy(m)]
+        # Stable sort keeps configuration order among equal scores
+        ranked = sorted(usable, key=self._score)
+        fallbacks = [m for m in self.models if m not in ranked]
+
+        if requested == AUTO_MODEL:
+            return ranked + fallbacks
+        targets = self.failover.get(requested, [])
+        return [requested] + [m for m in targets if m in usable] + [m for m in targets if m not in usable]
+
+    def record(self, model_id: str, latency: float, ok: bool) -> None:
+        self._health[model_id].record(latency, ok)
+
+    @property
+    def in_use(self) -> int:
+        return sum(pool.in_use for pool in self._pools.values())
+
+    def stats(self) -> List[Dict[str, Any]]:
+        stats = []
+        for model_id, (provider, model) in self.models.items():
+            health = self._health[model_id]
+            pool = self._pools.get(model_id)
+            mean_latency = health.mean_latency
+            stats.append({
+                "id": model_id,
+                "provider": provider,
+                "model": model,
+                "default": model_id == self.default_model,
+                "healthy": self.healthy(model_id),
+                "samples": health.samples,
+                "error_rate": round(health.error_rate, 4),
+                "mean_latency_ms": round(mean_latency * 1000, 1) if mean_latency is not None else None,
+                "sessions": pool.stats() if pool else None,
+            })
+        return stats
@@ -0,0 +1,198 @@
+"""
+Pre-generation scheduler
+Tracks popular generation requests and refreshes their cached ideas while the upstream is idle
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PregenerationError(Exception):
+    """A refresh that failed after its prompts were sent, with the tokens they are estimated to have cost"""
+
+    def __init__(self, message: str, tokens: int):
+        super().__init__(message)
+        self.tokens = tokens
+
+
+class PopularityTracker:
+    """Request counts per canonical key with exponential decay.
+
+    Each key keeps the most recent request seen for it, so it can be replayed.
+    Beyond max_keys the least popular tenth of the keys is dropped at once, so
+    the scan for them is spread over many requests.
+    """
+
+    def __init__(self, half_life_seconds: float = 3600, max_keys: int = 10000):
+        self.half_life = half_life_seconds
+        self.max_keys = max_keys
+        # key -> (score at updated, updated, request)
+        self._keys: Dict[str, Tuple[float, float, Any]] = {}
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        if self.half_life <= 0:
+            return score
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def record(self, key: str, request: Any) -> None:
+        now = time.monotonic()
+        score, updated, _ = self._keys.get(key, (0.0, now, None))
+        self._keys[key] = (self._decayed(score, updated, now) + 1.0, now, request)
+        if len(self._keys) > self.max_keys:
+            excess = len(self._keys) - self.max_keys + max(1, self.max_keys // 10)
+            for coldest in heapq.nsmallest(excess, self._keys, key=lambda k: self._decayed(*self._keys[k][:2], now)):
+                del self._keys[coldest]
+
+    def top(self, n: int, min_score: float = 0.0) -> List[Tuple[str, float, Any]]:
+        """Up to n (key, score, request) with score >= min_score, most popular first"""
+        now = time.monotonic()
+        scored = [(key, self._decayed(score, updated, now), request)
+                  for key, (score, updated, request) in self._keys.items()]
+        scored = [entry for entry in scored if entry[1] >= min_score]
+        scored.sort(key=lambda entry: -entry[1])
+        return scored[:n]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+
+class PregenerationScheduler:
+    """Refresh cached results for the most popular requests in the background.
+
+    Every interval, while idle() holds, the top_n requests with a score of at
+    least min_score whose cached result is missing or expires within
+    refresh_seconds are regenerated one at a time. generate(request) returns the
+    upstream tokens it used, which are charged to a budget refilled at
+    token_budget_per_hour; work stops when the budget runs out or traffic picks up.
+    A refresh failing with PregenerationError is charged its tokens or an
+    average refresh, whichever is more, and a failing key is retried only after
+    an exponential backoff starting at interval and capped at max_backoff_seconds.
+    """
+
+    def __init__(self, generate: Callable[[Any], Awaitable[int]], ttl_remaining: Callable[[str], Optional[float]],
+                 idle: Callable[[], bool], top_n: int = 20, interval: float = 30, min_score: float = 3,
+                 refresh_seconds: float = 300, token_budget_per_hour: float = 50000,
+                 half_life_seconds: float = 3600, max_backoff_seconds: float = 6 * 3600):
+        self.generate = generate
+        self.ttl_remaining = ttl_remaining
+        self.idle = idle
+        self.top_n = top_n
+        self.interval = interval
+        self.min_score = min_score
+        self.refresh_seconds = refresh_seconds
+        self.token_budget_per_hour = token_budget_per_hour
+        self.max_backoff_seconds = max_backoff_seconds
+        self.popularity = PopularityTracker(half_life_seconds)
+        # key -> (consecutive failures, monotonic time before which it isn't retried)
+        self._backoff: Dict[str, Tuple[int, float]] = {}
+        self._average_tokens = 0.0
+        self._tokens = float(token_budget_per_hour)
+        self._refilled = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self.generated = 0
+        self.failed = 0
+        self.tokens_used = 0
+        self.paused = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n > 0 and self.interval > 0 and self.token_budget_per_hour > 0
+
+    def record(self, key: str, request: Any) -> None:
+        if self.enabled:
+            self.popularity.record(key, request)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        rate = self.token_budget_per_hour / 3600
+        self._tokens = min(float(self.token_budget_per_hour), self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        return self._tokens
+
+    def due(self) -> List[Tuple[str, Any]]:
+        """Popular requests whose cached result is missing or about to expire"""
+        due = []
+        now = time.monotonic()
+        for key, _, request in self.popularity.top(self.top_n, self.min_score):
+            if self._backoff.get(key, (0, 0.0))[1] > now:
+                continue
+            remaining = self.ttl_remaining(key)
+            if remaining is None or remaining <= self.refresh_seconds:
+                due.append((key, request))
+        return due
+
+    async def run_once(self) -> int:
+        """Pre-generate due requests while idle and within budget; returns how many were generated"""
+        generated = 0
+        # Forget failures of keys that are no longer tracked
+        self._backoff = {key: entry for key, entry in self._backoff.items() if key in self.popularity}
+        for key, request in self.due():
+            if not self.idle():
+                self.paused += 1
+                break
+            if self._refill() <= 0:
+                break
+            try:
+                tokens = await self.generate(request)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                if isinstance(e, PregenerationError):
+                    self._charge(max(e.tokens, round(self._average_tokens)))
+                failures = self._backoff.get(key, (0, 0.0))[0] + 1
+                delay = min(self.max_backoff_seconds, self.interval * 2 ** (failures - 1))
+                self._backoff[key] = (failures, time.monotonic() + delay)
+                logger.warning("Pre-generation failed (%d in a row, retry in %.0fs): %s", failures, delay, e)
+                continue
+            self._charge(tokens)
+            self._average_tokens = tokens if not self.generated else 0.8 * self._average_tokens + 0.2 * tokens
+            self._backoff.pop(key, None)
+            self.generated += 1
+            generated += 1
+        return generated
+
+    def _charge(self, tokens: int) -> None:
+        self._tokens -= tokens
+        self.tokens_used += tokens
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Pre-generation scheduler error")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self.popularity),
+            "due": len(self.due()) if self.enabled else 0,
+            "generated": self.generated,
+            "failed": self.failed,
+            "paused": self.paused,
+            "backing_off": sum(1 for _, retry_at in self._backoff.values() if retry_at > time.monotonic()),
+            "tokens_used": self.tokens_used,
+            "tokens_available": round(self._refill()),
+        }
@@ -0,0 +1,153 @@
+"""
+Prompt templates
+Precompiled generation prompts, token counting and input-token budgeting
+"""
+
+import importlib.util
+import logging
+import string
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# tiktoken and its encoding are loaded on first use (or by the startup warm-up)
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+# None until loaded; False if loading failed
+_encoding = None
+
+
+def _load_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except ValueError:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads its encoding files on first use unless TIKTOKEN_CACHE_DIR has them
+            logger.warning("tiktoken encoding unavailable, estimating token counts: %s", e)
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken; about 4 characters per token if its encoding can't be loaded"""
+    encoding = _load_encoding() if TIKTOKEN_AVAILABLE else None
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+class PromptTemplate:
+    """A str.format template parsed once into literal and field segments"""
+
+    def __init__(self, text: str):
+        self.text = text
+        # (literal, field name or None)
+        self._segments: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in string.Formatter().parse(text)
+        ]
+        self.fields = list(dict.fromkeys(field for _, field in self._segments if field))
+
+    def render(self, **values: Any) -> str:
+        parts = []
+        for literal, field in self._segments:
+            parts.append(literal)
+            if field:
+                parts.append(str(values[field]))
+        return "".join(parts)
+
+
+IDEA_PROMPT = PromptTemplate("""Create {count} innovative electronics project ideas using these components: {components}
+
+Context:
+- Theme: {theme}
+- Skill level: {skill_level}
+- Duration: {duration}
+- Team: {team_size}
+- Priority: educational value and practical real-world application{focus_line}
+
+Every project must be technically feasible with the given components, solve a genuine real-world problem, be engaging to build, and suit {skill_level} makers, a {duration} timeframe and {team_size} work.
+
+Respond with JSON in exactly this format:
+{{"projects": [{{
+  "title": "descriptive project name",
+  "description": "2-3 sentence overview",
+  "problem_statement": "real-world problem addressed",
+  "working_principle": "how the system works technically",
+  "components": ["components used, from the list above"],
+  "difficulty": "{skill_level}",
+  "estimated_cost": "realistic range in ₹",
+  "innovation_elements": ["..."],
+  "scalability_options": ["..."],
+  "learning_outcomes": ["..."],
+  "tags": ["..."]
+}}]}}""")
+
+
+def build_idea_prompt(components_str: str, theme: str, skill_level: str, count: Any,
+                      duration: str, team_size: str, focus: str = "") -> str:
+    """Render the idea generation prompt"""
+    focus_line = f"\n- Diversity focus: {focus} (other batches cover different angles)" if focus else ""
+    return IDEA_PROMPT.render(
+        components=components_str, theme=theme, skill_level=skill_level, count=count,
+        duration=duration, team_size=team_size, focus_line=focus_line,
+    )
+
+
+def _grouped(groups: List[Tuple[str, List[str]]], per_group: int) -> str:
+    parts = []
+    for category, names in groups:
+        if per_group <= 0:
+            parts.append(f"{category} x{len(names)}")
+            continue
+        shown = ", ".join(names[:per_group])
+        hidden = len(names) - per_group
+        parts.append(f"{category}: {shown}" + (f" (+{hidden} more)" if hidden > 0 else ""))
+    return "; ".join(parts)
+
+
+def fit_components(components: List[Dict[str, Any]], budget: int,
+                   category_of: Callable[[Dict[str, Any]], Optional[str]]) -> Tuple[str, str]:
+    """Render component names within budget tokens.
+
+    Returns (text, strategy): "full" lists every name; "grouped" groups names
+    by category and lists only the first few per category; "summarized" keeps
+    only per-category counts.
+    """
+    names = list(dict.fromkeys(component.get('name', str(component)) for component in components))
+    text = ", ".join(names)
+    if count_tokens(text) <= budget:
+        return text, "full"
+
+    grouped: Dict[str, List[str]] = {}
+    seen = set()
+    for component in components:
+        name = component.get('name', str(component))
+        if name in seen:
+            continue
+        seen.add(name)
+        grouped.setdefault(category_of(component) or "Other", []).append(name)
+    # Largest categories first, so they survive if the summary itself has to be cut
+    groups = sorted(grouped.items(), key=lambda item: -len(item[1]))
+
+    # Largest per-category name limit that fits
+    low, high = 0, max(len(group) for _, group in groups)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(_grouped(groups, middle)) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low > 0:
+        return _grouped(groups, low), "grouped"
+
+    # Even counts alone are over budget: drop the smallest categories
+    while len(groups) > 1 and count_tokens(_grouped(groups, 0)) > budget:
+        groups = groups[:-1]
+    omitted = len(names) - sum(len(group) for _, group in groups)
+    text = _grouped(groups, 0) + (f"; +{omitted} other components" if omitted else "")
+    return text, "summarized"
@@ -0,0 +1,167 @@
+"""
+Rate limiting and fair scheduling
+Per-client token buckets and a round-robin queue for shared upstream capacity
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+ANONYMOUS_CLIENT = "anonymous"
+
+# Client (user, session or IP) the current request is served for, inherited by tasks it spawns
+current_client: ContextVar[str] = ContextVar("client", default=ANONYMOUS_CLIENT)
+
+
+@contextmanager
+def client_context(client: str) -> Iterator[None]:
+    """Attribute upstream calls in this context to client"""
+    token = current_client.set(client)
+    try:
+        yield
+    finally:
+        current_client.reset(token)
+
+
+class RateLimiter:
+    """Token bucket per client: burst requests at once, refilled at rate_per_minute.
+
+    A request costing more than is available is still admitted when the bucket
+    holds at least min(cost, burst) tokens; the bucket then goes negative, so
+    the client waits for the debt to refill. Buckets of the least recently seen
+    clients are dropped beyond max_clients.
+    """
+
+    def __init__(self, rate_per_minute: float = 60, burst: int = 20, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        # client -> (tokens, monotonic time of last update)
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, client: str, cost: float = 1.0) -> float:
+        """Take cost tokens; returns 0 if admitted, otherwise seconds until the client may retry"""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        needed = min(cost, self.burst)
+        if tokens >= needed:
+            tokens -= cost
+            retry_after = 0.0
+            self.allowed += 1
+        else:
+            retry_after = (needed - tokens) / self.rate
+            self.limited += 1
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def refund(self, client: str, cost: float = 1.0) -> None:
+        """Give back the tokens of an admitted request that was then rejected by another limit"""
+        bucket = self._buckets.get(client)
+        if not self.enabled or bucket is None:
+            return
+        tokens, updated = bucket
+        self._buckets[client] = (min(float(self.burst), tokens + cost), updated)
+        self.allowed -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class FairScheduler:
+    """Concurrency limit that hands free slots to waiting clients round-robin.
+
+    Each client's waiters are served FIFO, but a client with many queued calls
+    only gets every Nth free slot while N clients are waiting, instead of the
+    strict arrival order of a semaphore.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.active = 0
+        # client -> its waiters, in round-robin order
+        self._waiting: "OrderedDict[str, deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    @asynccontextmanager
+    async def slot(self, client: Optional[str] = None) -> AsyncIterator[None]:
+        await self.acquire(client or current_client.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, client: str) -> None:
+        if self.active < self.capacity and not self._waiting:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(client, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._remove(client, future)
+            else:
+                # Granted a slot just as we were cancelled: pass it on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._grant()
+
+    def _remove(self, client: str, future: asyncio.Future) -> None:
+        waiters = self._waiting.get(client)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiting[client]
+
+    def _grant(self) -> None:
+        while self.active < self.capacity and self._waiting:
+            client, waiters = next(iter(self._waiting.items()))
+            future = waiters.popleft()
+            if waiters:
+                # The client goes to the back of the rotation
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            if not future.done():
+                future.set_result(None)
+                self.active += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "waiting": self.waiting,
+            "waiting_clients": len(self._waiting),
+        }
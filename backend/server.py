@@ -4,29 +4,153 @@ Atal Idea Generator Backend Server
 FastAPI backend with Emergent LLM integration for AI idea generation
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from contextlib import asynccontextmanager, contextmanager
 import os
 import asyncio
+import atexit
+import functools
+import hmac
+import importlib.util
+import logging
+import math
 import uuid
 from datetime import datetime
 import json
 from dotenv import load_dotenv
 
+from idea_cache import IdeaCache, make_cache_key
+from similarity_cache import NUMPY_AVAILABLE, SimilarityCache, load_numpy
+from idea_store import IdeaStore
+from buildable_index import BuildableIndex
+from idea_parser import ProjectParseError, ProjectStreamParser, normalize_project, parse_projects
+from component_catalog import ComponentCatalog
+from component_store import ComponentImportError, ComponentStore, parse_csv, parse_jsonl
+from encoded_payloads import PayloadCache, negotiated_response
+from fanout import DIVERSITY_HINTS, ProjectDeduper, gather_bounded, plan_shards, shard_focus
+from llm_upstream import CircuitOpenError, DeadlineExceededError, UpstreamClient, deadline, remaining_time
+from metrics import MetricsMiddleware, Registry
+from single_flight import SingleFlight
+from model_router import DEFAULT_FAILOVER, ModelRouter, UnknownModelError, parse_failover, parse_model_specs
+from prompt_templates import build_idea_prompt, count_tokens, fit_components
+from job_queue import JobQueue, JobQueueFull
+from rate_limit import RateLimiter, client_context, current_client
+from pregeneration import PregenerationError, PregenerationScheduler
+from structured_log import ExchangeCapture, RequestLogMiddleware, log_stage, setup_logging
+
 # Load environment variables
 load_dotenv()
 
-# Import Emergent LLM integration
-try:
-    from emergentintegrations.llm.chat import LlmChat, UserMessage
+# JSON-lines logs written to stdout by a background thread, so logging never blocks a request
+log_pipeline = setup_logging(os.environ.get('LOG_LEVEL', 'INFO'), os.environ.get('LOG_FORMAT', 'json'))
+atexit.register(log_pipeline.stop)
+logger = logging.getLogger("atal")
+# One line per upstream HTTP call duplicates the upstream metrics
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# LLM backend: "emergent" (default) or "mock" for offline benchmarks and development
+LLM_BACKEND = os.environ.get('LLM_BACKEND', 'emergent')
+
+# Emergent LLM integration; the SDK is imported on first use (or by the startup warm-up)
+if LLM_BACKEND == 'mock':
     EMERGENT_AVAILABLE = True
-except ImportError:
-    EMERGENT_AVAILABLE = False
-    print("❌ emergentintegrations not available. Installing...")
+    logger.info("🧪 Using mock LLM backend")
+else:
+    EMERGENT_AVAILABLE = importlib.util.find_spec("emergentintegrations") is not None
+    if not EMERGENT_AVAILABLE:
+        logger.error("❌ emergentintegrations not available. Installing...")
+
+_llm_sdk: Optional[Tuple[Any, Any]] = None
+
+def load_llm_sdk() -> Tuple[Any, Any]:
+    """Import the LLM SDK on first use and return (LlmChat, UserMessage)"""
+    global _llm_sdk, EMERGENT_AVAILABLE
+    if _llm_sdk is None:
+        if LLM_BACKEND == 'mock':
+            from mock_llm import MockLlmChat as LlmChat, UserMessage
+        else:
+            try:
+                from emergentintegrations.llm.chat import LlmChat, UserMessage
+            except ImportError as e:
+                EMERGENT_AVAILABLE = False
+                raise HTTPException(status_code=500, detail=f"Emergent LLM integration not available: {e}")
+        _llm_sdk = (LlmChat, UserMessage)
+    return _llm_sdk
+
+def user_message(text: str):
+    _, UserMessage = load_llm_sdk()
+    return UserMessage(text=text)
+
+# Warm up the LLM SDK, tokenizer and session pool in the background after startup
+LLM_WARMUP = os.environ.get('LLM_WARMUP', 'true').lower() == 'true'
+LLM_WARMUP_SESSIONS = int(os.environ.get('LLM_WARMUP_SESSIONS', '2'))
+
+# Startup timings reported by /api/health
+STARTUP_REPORT: Dict[str, Any] = {"warmup": {"status": "disabled" if not LLM_WARMUP else "pending"}}
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+async def warm_up():
+    """Load lazily imported dependencies before the first request needs them"""
+    report = STARTUP_REPORT["warmup"]
+    report.update(status="running", steps={})
+    started = time.perf_counter()
+    steps = [
+        ("llm_sdk", load_llm_sdk),
+        ("tokenizer", lambda: count_tokens(SYSTEM_MESSAGE)),
+        ("numpy", load_numpy if similar_ideas.enabled and NUMPY_AVAILABLE else None),
+    ]
+    try:
+        for name, step in steps:
+            if step is None:
+                continue
+            step_started = time.perf_counter()
+            await asyncio.to_thread(step)
+            report["steps"][name] = elapsed_ms(step_started)
+        if LLM_WARMUP_SESSIONS > 0 and (os.environ.get('EMERGENT_LLM_KEY') or LLM_BACKEND == 'mock'):
+            step_started = time.perf_counter()
+            report["sessions"] = model_router.pool(model_router.default_model).prefill(LLM_WARMUP_SESSIONS)
+            report["steps"]["sessions"] = elapsed_ms(step_started)
+        report["status"] = "done"
+    except Exception as e:
+        report.update(status="failed", error=getattr(e, "detail", None) or str(e))
+        logger.warning("⚠️ Warm-up failed: %s", report["error"])
+    report["ms"] = elapsed_ms(started)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load persisted state on startup and run background tasks while serving"""
+    started = time.perf_counter()
+    STARTUP_REPORT["imports_ms"] = round((started - IMPORT_STARTED) * 1000, 1)
+    load_component_store()
+    STARTUP_REPORT["component_store_ms"] = elapsed_ms(started)
+    rebuild_buildable_index()
+    watcher = asyncio.create_task(watch_component_store())
+    generation_jobs.start()
+    pregenerator.start()
+    warmup = asyncio.create_task(warm_up()) if LLM_WARMUP else None
+    STARTUP_REPORT["ready_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+    try:
+        yield
+    finally:
+        watcher.cancel()
+        if warmup:
+            warmup.cancel()
+        await pregenerator.stop()
+        await generation_jobs.stop()
+        if pending_writes:
+            await asyncio.gather(*pending_writes, return_exceptions=True)
+        idea_store.close()
 
-app = FastAPI(title="Atal Idea Generator API", version="1.0.0")
+app = FastAPI(title="Atal Idea Generator API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration for React frontend
 app.add_middleware(
@@ -37,6 +161,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics
+metrics_registry = Registry()
+HTTP_REQUESTS = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+HTTP_IN_FLIGHT = metrics_registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+GENERATION_STAGE_SECONDS = metrics_registry.histogram(
+    "idea_generation_stage_seconds", "Time spent in each stage of idea generation", ("stage",))
+LLM_REQUESTS = metrics_registry.counter(
+    "llm_upstream_requests_total", "Upstream LLM calls by model and outcome", ("model", "outcome"))
+LLM_LATENCY = metrics_registry.histogram(
+    "llm_upstream_duration_seconds", "Upstream LLM call latency by model", ("model",))
+LLM_TOKENS = metrics_registry.counter(
+    "llm_upstream_estimated_tokens_total", "Estimated upstream tokens", ("direction",))
+
+app.add_middleware(MetricsMiddleware, requests=HTTP_REQUESTS, latency=HTTP_LATENCY, in_flight=HTTP_IN_FLIGHT)
+app.add_middleware(RequestLogMiddleware)
+
+@contextmanager
+def generation_stage(stage: str):
+    """Time a generation stage into the stage histogram and the request's log line"""
+    with GENERATION_STAGE_SECONDS.time(stage=stage), log_stage(stage):
+        yield
+
+# Sampled prompt/response capture for offline analysis (LLM_CAPTURE_SAMPLE_RATE=0 disables)
+exchange_capture = ExchangeCapture(
+    os.environ.get('LLM_CAPTURE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'captures')),
+    sample_rate=float(os.environ.get('LLM_CAPTURE_SAMPLE_RATE', '0')),
+    max_bytes=int(os.environ.get('LLM_CAPTURE_MAX_BYTES', str(10 * 1024 * 1024))),
+    backups=int(os.environ.get('LLM_CAPTURE_BACKUPS', '20')),
+)
+atexit.register(exchange_capture.stop)
+
 # Data Models
 class Component(BaseModel):
     id: str
@@ -48,6 +206,32 @@ class GenerationRequest(BaseModel):
     selected_components: List[Dict[str, Any]]
     preferences: Dict[str, Any] = {}
     model_id: str = "gpt-4o-mini"
+    use_cache: bool = True
+    reuse_existing: bool = False  # answer from stored ideas buildable with the selected parts when enough exist
+    allow_similar: bool = True  # serve ideas cached for a near-identical component set
+    fan_out: Optional[bool] = None  # None: shard automatically above IDEA_FANOUT_THRESHOLD
+    
+    @field_validator("preferences")
+    @classmethod
+    def check_count(cls, preferences: Dict[str, Any]) -> Dict[str, Any]:
+        """Idea count must be a whole number from 1 to IDEA_MAX_COUNT"""
+        if "count" not in preferences:
+            return preferences
+        count = preferences["count"]
+        if isinstance(count, str) and count.strip().isdigit():
+            count = int(count)
+        if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_IDEA_COUNT:
+            raise ValueError(f"preferences.count must be a whole number from 1 to {MAX_IDEA_COUNT}")
+        return {**preferences, "count": count}
+
+class BatchGenerationRequest(BaseModel):
+    requests: List[GenerationRequest]
+
+class BuildableIdeasRequest(BaseModel):
+    selected_components: List[Dict[str, Any]]
+    max_missing: int = 0  # ideas may need up to this many parts not in selected_components
+    difficulty: Optional[str] = None
+    limit: int = 20
 
 class IdeaResponse(BaseModel):
     id: str
@@ -82,21 +266,62 @@ SAMPLE_COMPONENTS = [
     {"id": "lcd_display", "name": "LCD Display", "category": "Display", "description": "16x2 character display"},
 ]
 
-# LLM Chat instance
-llm_chat = None
+# Indexed component catalog, seeded with the samples until the store is loaded
+component_catalog = ComponentCatalog(SAMPLE_COMPONENTS)
 
-def get_llm_chat():
-    """Get or create LLM chat instance"""
-    global llm_chat
-    if llm_chat is None:
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
-            raise HTTPException(status_code=500, detail="EMERGENT_LLM_KEY not found in environment")
-        
-        llm_chat = LlmChat(
-            api_key=api_key,
-            session_id="atal_idea_generator",
-            system_message="""You are an expert electronics engineer and innovative STEM educator with deep reasoning capabilities. 
+# File-backed component store
+component_store = ComponentStore(os.environ.get(
+    'COMPONENTS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'components.jsonl')
+))
+component_store_signature = None
+
+# Pre-encoded catalog responses, invalidated when the catalog version changes
+component_payloads = PayloadCache(max_age=int(os.environ.get('COMPONENTS_CACHE_MAX_AGE', '60')))
+component_import_lock = asyncio.Lock()
+
+def load_component_store() -> bool:
+    """Load the component store into the catalog if the file exists"""
+    global component_store_signature
+    signature = component_store.signature()
+    if signature is None:
+        return False
+    component_catalog.load(component_store.load())
+    component_store_signature = signature
+    return True
+
+async def watch_component_store():
+    """Reload the catalog whenever the component file changes on disk"""
+    interval = float(os.environ.get('COMPONENTS_RELOAD_INTERVAL', '2'))
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        if component_store.signature() == component_store_signature:
+            continue
+        try:
+            async with component_import_lock:
+                if await asyncio.to_thread(load_component_store):
+                    logger.info("🔄 Reloaded %d components from %s", len(component_catalog), component_store.path)
+                    rebuild_buildable_index()
+        except Exception:
+            logger.exception("Component reload error")
+
+def save_component_store(components: List[Dict[str, Any]]) -> None:
+    """Persist components and swap them into the catalog"""
+    global component_store_signature
+    component_store.save(components)
+    component_catalog.load(components)
+    component_store_signature = component_store.signature()
+
+def require_admin(admin_key: Optional[str]) -> None:
+    """Reject requests without the configured ADMIN_API_KEY"""
+    expected = os.environ.get('ADMIN_API_KEY')
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin API disabled: ADMIN_API_KEY not configured")
+    if not admin_key or not hmac.compare_digest(admin_key, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+SYSTEM_MESSAGE = """You are an expert electronics engineer and innovative STEM educator with deep reasoning capabilities. 
 You specialize in creating practical, educational, and exciting project ideas that solve real-world problems.
 
 Your expertise includes:
@@ -108,9 +333,210 @@ Your expertise includes:
 - Problem-solving through systematic reasoning
 
 Always respond with valid JSON only. No additional text, explanations, or reasoning outside the JSON structure."""
-        ).with_model("openai", "gpt-4o-mini")
+
+@functools.lru_cache(maxsize=None)
+def system_tokens() -> int:
+    # Computed on first use so tokenizer loading stays out of import time
+    return count_tokens(SYSTEM_MESSAGE)
+
+# Input-token budget per prompt; large component selections are grouped by category to fit (0 disables)
+PROMPT_MAX_INPUT_TOKENS = int(os.environ.get('PROMPT_MAX_INPUT_TOKENS', '2000'))
+
+# Concurrency limits, retries and per-model circuit breaking for upstream LLM calls
+llm_upstream = UpstreamClient(
+    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', '32')),
+    per_model_concurrency=int(os.environ.get('LLM_MODEL_MAX_CONCURRENCY', '16')),
+    max_attempts=int(os.environ.get('LLM_MAX_ATTEMPTS', '3')),
+    base_delay=float(os.environ.get('LLM_RETRY_BASE_DELAY', '0.5')),
+    max_delay=float(os.environ.get('LLM_RETRY_MAX_DELAY', '8')),
+    attempt_timeout=float(os.environ.get('LLM_ATTEMPT_TIMEOUT', '60')),
+    failure_threshold=int(os.environ.get('LLM_CIRCUIT_FAILURE_THRESHOLD', '5')),
+    reset_timeout=float(os.environ.get('LLM_CIRCUIT_RESET_SECONDS', '30')),
+)
+GENERATION_DEADLINE_SECONDS = float(os.environ.get('GENERATION_DEADLINE_SECONDS', '90'))
+
+# Per-client quotas for the generation endpoints (RATE_LIMIT_PER_MINUTE=0 disables)
+rate_limiter = RateLimiter(
+    rate_per_minute=float(os.environ.get('RATE_LIMIT_PER_MINUTE', '60')),
+    burst=int(os.environ.get('RATE_LIMIT_BURST', '20')),
+    max_clients=int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', '10000')),
+)
+# Per-IP quotas above them, since user and session ids are chosen by the caller (RATE_LIMIT_IP_PER_MINUTE=0 disables)
+ip_rate_limiter = RateLimiter(
+    rate_per_minute=float(os.environ.get('RATE_LIMIT_IP_PER_MINUTE', '300')),
+    burst=int(os.environ.get('RATE_LIMIT_IP_BURST', '60')),
+    max_clients=int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', '10000')),
+)
+# Only trust X-Forwarded-For behind a proxy that sets it
+RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+
+def client_ip(request: Request) -> str:
+    """The caller's address, from X-Forwarded-For only when behind a trusted proxy"""
+    forwarded = request.headers.get("x-forwarded-for") if RATE_LIMIT_TRUST_PROXY else None
+    if forwarded:
+        return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def client_key(request: Request) -> str:
+    """Identify the caller by user id, session id or IP address, always under their IP"""
+    ip = client_ip(request)
+    user_id = request.headers.get("x-user-id")
+    if user_id:
+        return f"{ip}/user:{user_id}"
+    session_id = request.headers.get("x-session-id")
+    if session_id:
+        return f"{ip}/session:{session_id}"
+    return ip
+
+def admit_client(request: Request, cost: float = 1) -> str:
+    """Charge the caller's quota and their IP's (429 when either is exhausted).
+
+    Upstream calls are shared fairly between IPs, so rotating session ids gets
+    neither a fresh quota nor an extra share of upstream capacity.
+    """
+    ip = client_ip(request)
+    client = client_key(request)
+    retry_after = rate_limiter.acquire(client, cost)
+    if retry_after <= 0:
+        retry_after = ip_rate_limiter.acquire(ip, cost)
+        if retry_after > 0:
+            # Turned away by the IP quota, so it doesn't count against the caller's own
+            rate_limiter.refund(client, cost)
+    if retry_after > 0:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded; please slow down",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    current_client.set(ip)
+    return ip
+
+async def rate_limited(request: Request) -> str:
+    """Dependency applying admit_client to a generation endpoint"""
+    return admit_client(request)
+
+# Generated ideas cache, keyed on the canonical request hash
+idea_cache = IdeaCache(
+    ttl_seconds=float(os.environ.get('IDEA_CACHE_TTL_SECONDS', '3600')),
+    max_entries=int(os.environ.get('IDEA_CACHE_MAX_ENTRIES', '1024')),
+    max_bytes=int(os.environ.get('IDEA_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+)
+
+# Near-duplicate lookup over idea_cache keys, by component-set similarity
+similar_ideas = SimilarityCache(
+    threshold=float(os.environ.get('SIMILARITY_CACHE_THRESHOLD', '0.85')),
+    max_entries=int(os.environ.get('SIMILARITY_CACHE_MAX_ENTRIES', '4096')),
+)
+
+# In-flight generations shared by identical concurrent requests
+generation_flights = SingleFlight()
+COALESCE_WAIT_TIMEOUT = float(os.environ.get('COALESCE_WAIT_TIMEOUT', '120')) or None
+
+# Persistent store of generated ideas
+idea_store = IdeaStore(os.environ.get(
+    'IDEA_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ideas.db')
+))
+# Stored ideas by required components, for "buildable with my parts" lookups
+buildable_ideas = BuildableIndex(component_catalog.id_for_name)
+# Background store work, awaited on shutdown before the store is closed
+pending_writes = set()
+
+def run_in_background(coroutine) -> None:
+    task = asyncio.create_task(coroutine)
+    pending_writes.add(task)
+    task.add_done_callback(pending_writes.discard)
+
+def store_ideas(ideas: List[Dict[str, Any]]) -> None:
+    idea_store.add_many(ideas)
+    buildable_ideas.sync(idea_store.components_since)
+
+def persist_ideas(ideas: List[Dict[str, Any]]) -> None:
+    """Write generated ideas to the idea store without delaying the response"""
+    async def write():
+        try:
+            await asyncio.to_thread(store_ideas, ideas)
+        except Exception:
+            logger.exception("Idea store write error")
     
-    return llm_chat
+    run_in_background(write())
+
+def rebuild_buildable_index() -> None:
+    """Re-map stored ideas onto the current catalog without blocking requests"""
+    async def rebuild():
+        try:
+            await asyncio.to_thread(buildable_ideas.rebuild, idea_store.components_since)
+        except Exception:
+            logger.exception("Buildable index rebuild error")
+    
+    run_in_background(rebuild())
+
+def inventory_keys(components: List[Dict[str, Any]]) -> List[str]:
+    """Index keys for selected components: catalog id when known, otherwise the name"""
+    keys = []
+    for component in components:
+        component_id = component.get('id')
+        if component_id is not None and component_catalog.get(component_id) is not None:
+            keys.append(component_id)
+        else:
+            keys.append(buildable_ideas.component_key(component.get('name', str(component))))
+    return keys
+
+def component_label(key: str) -> str:
+    component = component_catalog.get(key)
+    return component.get('name', key) if component else key.removeprefix("name:")
+
+async def find_buildable_ideas(components: List[Dict[str, Any]], max_missing: int, limit: int,
+                               difficulty: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Stored ideas buildable from components with at most max_missing extra parts, and the total match count"""
+    matches, total = buildable_ideas.query(inventory_keys(components), max_missing, limit, difficulty)
+    stored = await asyncio.to_thread(idea_store.get_many, [idea_id for idea_id, _ in matches])
+    ideas = [
+        {**stored[idea_id], "missing_components": [component_label(key) for key in missing]}
+        for idea_id, missing in matches if idea_id in stored
+    ]
+    return ideas, total
+
+# Fan-out settings for large idea counts
+FANOUT_THRESHOLD = int(os.environ.get('IDEA_FANOUT_THRESHOLD', '6'))
+FANOUT_SHARD_SIZE = int(os.environ.get('IDEA_FANOUT_SHARD_SIZE', '3'))
+FANOUT_CONCURRENCY = int(os.environ.get('IDEA_FANOUT_CONCURRENCY', '4'))
+# One shard per diversity hint by default, so no two shard prompts share a focus
+MAX_IDEA_COUNT = int(os.environ.get('IDEA_MAX_COUNT', str(len(DIVERSITY_HINTS) * max(1, FANOUT_SHARD_SIZE))))
+
+# Batch generation limits
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '100'))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '8'))
+
+def get_llm_api_key() -> str:
+    """Get the LLM API key, failing the request if it is not configured"""
+    api_key = os.environ.get('EMERGENT_LLM_KEY') or ('mock' if LLM_BACKEND == 'mock' else None)
+    if not api_key:
+        raise HTTPException(status_code=500, detail="EMERGENT_LLM_KEY not found in environment")
+    return api_key
+
+def create_chat(provider: str, model: str, session_id: str):
+    """Create a chat client for one pooled session"""
+    LlmChat, _ = load_llm_sdk()
+    return LlmChat(
+        api_key=get_llm_api_key(),
+        session_id=session_id,
+        system_message=SYSTEM_MESSAGE
+    ).with_model(provider, model)
+
+# Models requests can route to, each with its own session pool and health stats
+model_router = ModelRouter(
+    create_chat,
+    parse_model_specs(os.environ.get('LLM_MODELS', 'gpt-4o-mini,gpt-4o,claude-3-7-sonnet-20250219,gemini-2.0-flash')),
+    default_model=os.environ.get('LLM_DEFAULT_MODEL', 'gpt-4o-mini'),
+    pool_size=int(os.environ.get('LLM_POOL_SIZE', '16')),
+    max_turns=int(os.environ.get('LLM_SESSION_MAX_TURNS', '1')),
+    failover=parse_failover(os.environ.get('LLM_FAILOVER_MODELS', DEFAULT_FAILOVER))
+    if os.environ.get('LLM_FAILOVER', 'true').lower() == 'true' else {},
+)
+
+def resolve_model(model_id: str) -> str:
+    """Validate a requested model_id, mapping unknown models to a 400"""
+    try:
+        return model_router.resolve(model_id)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/health")
 async def health_check():
@@ -119,143 +545,830 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "emergent_llm_available": EMERGENT_AVAILABLE,
+        "llm_backend": LLM_BACKEND,
+        "llm_circuits": llm_upstream.stats()["circuits"],
+        "startup": STARTUP_REPORT,
         "version": "1.0.0"
     }
 
 @app.get("/api/components")
-async def get_components():
+async def get_components(request: Request, fields: Optional[str] = None):
     """Get all available components"""
-    return SAMPLE_COMPONENTS
+    return component_payloads.respond(request, component_catalog.version, "all", component_catalog.all, fields)
+
+@app.get("/api/components/search")
+async def search_components(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    fields: Optional[str] = None,
+):
+    """Search components by name and description word prefixes"""
+    results = await asyncio.to_thread(component_catalog.search, q, limit)
+    return negotiated_response(request, results, fields)
 
 @app.get("/api/components/{component_id}")
-async def get_component(component_id: str):
+async def get_component(component_id: str, request: Request, fields: Optional[str] = None):
     """Get component by ID"""
-    component = next((c for c in SAMPLE_COMPONENTS if c["id"] == component_id), None)
+    component = component_catalog.get(component_id)
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
-    return component
+    return component_payloads.respond(
+        request, component_catalog.version, ("id", component_id), lambda: component, fields)
 
 @app.get("/api/components/category/{category}")
-async def get_components_by_category(category: str):
+async def get_components_by_category(category: str, request: Request, fields: Optional[str] = None):
     """Get components by category"""
-    components = [c for c in SAMPLE_COMPONENTS if c["category"].lower() == category.lower()]
-    return components
+    return component_payloads.respond(
+        request, component_catalog.version, ("category", category.casefold()),
+        lambda: component_catalog.by_category(category), fields
+    )
+
+@app.post("/api/admin/components/import")
+async def import_components(
+    request: Request,
+    mode: str = Query("merge", pattern="^(merge|replace)$"),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    x_admin_key: Optional[str] = Header(None),
+):
+    """Bulk import components from a CSV or JSON-lines request body"""
+    require_admin(x_admin_key)
+    
+    body = (await request.body()).decode("utf-8-sig")
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    try:
+        imported = parse_csv(body) if format == "csv" else parse_jsonl(body)
+    except ComponentImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async with component_import_lock:
+        components = imported if mode == "replace" else [*component_catalog.all(), *imported]
+        components = list({component["id"]: component for component in components}.values())
+        await asyncio.to_thread(save_component_store, components)
+    rebuild_buildable_index()
+    
+    return {
+        "imported": len(imported),
+        "total": len(component_catalog),
+        "mode": mode,
+        "version": component_catalog.version,
+    }
+
+def register_state_metrics() -> None:
+    """Expose cache, coalescing and pool state sampled at scrape time"""
+    metrics_registry.counter(
+        "idea_cache_lookups_total", "Generated ideas cache lookups by result", ("result",),
+        function=lambda: {("hit",): idea_cache.hits, ("miss",): idea_cache.misses})
+    metrics_registry.gauge(
+        "idea_cache_hit_ratio", "Generated ideas cache hit ratio since startup",
+        function=lambda: {(): idea_cache.stats()["hit_ratio"]})
+    metrics_registry.gauge(
+        "idea_cache_entries", "Entries in the generated ideas cache",
+        function=lambda: {(): len(idea_cache)})
+    metrics_registry.counter(
+        "idea_similarity_lookups_total", "Near-duplicate cache lookups by result", ("result",),
+        function=lambda: {("hit",): similar_ideas.hits, ("miss",): similar_ideas.misses})
+    metrics_registry.counter(
+        "idea_pregenerations_total", "Background refreshes of popular requests by outcome", ("outcome",),
+        function=lambda: {("success",): pregenerator.generated, ("error",): pregenerator.failed})
+    metrics_registry.counter(
+        "idea_pregeneration_tokens_total", "Estimated upstream tokens spent on background refreshes",
+        function=lambda: {(): pregenerator.tokens_used})
+    metrics_registry.gauge(
+        "idea_generations_in_flight", "Distinct generations currently running upstream",
+        function=lambda: {(): generation_flights.in_flight()})
+    metrics_registry.counter(
+        "idea_generations_coalesced_total", "Requests that joined an in-flight generation",
+        function=lambda: {(): generation_flights.followers})
+    metrics_registry.gauge(
+        "generation_jobs", "Background generation jobs by state", ("state",),
+        function=lambda: {("queued",): generation_jobs.stats()["queued"], ("running",): generation_jobs.running})
+    metrics_registry.gauge(
+        "llm_sessions_in_use", "LLM sessions currently borrowed from the pool",
+        function=lambda: {(): model_router.in_use})
+    metrics_registry.counter(
+        "llm_upstream_retries_total", "Upstream LLM calls retried after a retryable error",
+        function=lambda: {(): llm_upstream.retries})
+    metrics_registry.gauge(
+        "llm_upstream_in_flight", "Upstream LLM calls holding a concurrency slot",
+        function=lambda: {(): llm_upstream.in_flight})
+    metrics_registry.gauge(
+        "llm_upstream_waiting", "Upstream LLM calls queued for a fairly shared slot",
+        function=lambda: {(): llm_upstream.waiting})
+    metrics_registry.counter(
+        "rate_limited_requests_total", "Generation requests rejected with 429, by the quota exhausted", ("scope",),
+        function=lambda: {("client",): rate_limiter.limited, ("ip",): ip_rate_limiter.limited})
+    metrics_registry.gauge(
+        "rate_limit_buckets", "Rate limit buckets currently tracked", ("scope",),
+        function=lambda: {("client",): rate_limiter.stats()["clients"], ("ip",): ip_rate_limiter.stats()["clients"]})
+    metrics_registry.gauge(
+        "llm_circuit_open", "1 while a model's circuit breaker is rejecting calls", ("model",),
+        function=lambda: {(model,): 1 if state == "open" else 0
+                          for model, state in llm_upstream.stats()["circuits"].items()})
+    metrics_registry.counter(
+        "log_records_dropped_total", "Log records dropped because the log queue was full",
+        function=lambda: {(): log_pipeline.dropped})
+    metrics_registry.counter(
+        "llm_exchanges_captured_total", "Prompt/response pairs sampled into the exchange capture",
+        function=lambda: {(): exchange_capture.stats()["captured"]})
+    metrics_registry.counter(
+        "llm_exchanges_dropped_total", "Sampled prompt/response pairs dropped because the capture queue was full",
+        function=lambda: {(): exchange_capture.stats()["dropped"]})
+    metrics_registry.gauge(
+        "components_in_catalog", "Components in the catalog",
+        function=lambda: {(): len(component_catalog)})
+
+register_state_metrics()
+
+@app.get("/api/models")
+async def get_models():
+    """List the models requests can route to, with rolling latency and error rates"""
+    return {
+        "default": model_router.default_model,
+        "failover": model_router.failover,
+        "available": model_router.available_ids(),
+        "models": model_router.stats(),
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get generated ideas cache statistics"""
+    return {
+        **idea_cache.stats(),
+        "similarity": similar_ideas.stats(),
+        "coalescing": generation_flights.stats(),
+        "pregeneration": pregenerator.stats(),
+    }
+
+def extract_preferences(preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Read generation preferences with their defaults"""
+    return {
+        "theme": preferences.get('theme', 'General'),
+        "skill_level": preferences.get('skillLevel', 'Beginner'),
+        "count": preferences.get('count', 5),
+        "duration": preferences.get('duration', '1-2 hours'),
+        "team_size": preferences.get('teamSize', 'Individual'),
+    }
+
+def build_idea(project: Dict[str, Any], index: int, component_names: List[str],
+               theme: str, skill_level: str, generated_by: str) -> Dict[str, Any]:
+    """Convert a parsed LLM project into IdeaResponse format"""
+    idea = IdeaResponse(
+        id=f"generated_{int(datetime.now().timestamp())}_{index}_{uuid.uuid4().hex[:8]}",
+        title=project.get('title', f'Untitled Project {index+1}'),
+        description=project.get('description', 'No description provided'),
+        problem_statement=project.get('problem_statement', ''),
+        working_principle=project.get('working_principle', ''),
+        components=project.get('components', component_names),
+        difficulty=project.get('difficulty', skill_level),
+        estimated_cost=project.get('estimated_cost', '₹500-1000'),
+        innovation_elements=project.get('innovation_elements', []),
+        scalability_options=project.get('scalability_options', []),
+        learning_outcomes=project.get('learning_outcomes', []),
+        tags=project.get('tags', [theme, skill_level]),
+        availability="Available",
+        is_favorite=False,
+        created_at=datetime.now().isoformat(),
+        updated_at=datetime.now().isoformat(),
+        generated_by=generated_by
+    )
+    return idea.dict()
+
+def component_category(component: Dict[str, Any]) -> Optional[str]:
+    """Category of a selected component, from the request or the catalog"""
+    category = component.get('category')
+    if not category and component.get('id'):
+        category = (component_catalog.get(str(component['id'])) or {}).get('category')
+    return category
+
+def plan_generation_prompts(components: List[Dict[str, Any]], prefs: Dict[str, Any],
+                            fan_out: Optional[bool]) -> Tuple[List[str], Dict[str, Any]]:
+    """Build one prompt, or one prompt per shard when the request is fanned out.
+
+    Returns (prompts, info) where info holds the estimated input tokens and how
+    the component list was fitted into PROMPT_MAX_INPUT_TOKENS.
+    """
+    try:
+        count = int(prefs["count"])
+    except (TypeError, ValueError):
+        count = 0
+    
+    shard_sizes = []
+    if fan_out or (fan_out is None and count >= FANOUT_THRESHOLD):
+        shard_sizes = plan_shards(count, FANOUT_SHARD_SIZE)
+    if len(shard_sizes) <= 1:
+        shards = [{**prefs, "focus": ""}]
+    else:
+        shards = [
+            {**prefs, "count": size, "focus": shard_focus(i)}
+            for i, size in enumerate(shard_sizes)
+        ]
+    
+    if PROMPT_MAX_INPUT_TOKENS > 0:
+        overhead = system_tokens() + max(count_tokens(build_idea_prompt("", **shard)) for shard in shards)
+        components_str, strategy = fit_components(
+            components, max(64, PROMPT_MAX_INPUT_TOKENS - overhead), component_category
+        )
+    else:
+        components_str = ", ".join(component.get('name', str(component)) for component in components)
+        strategy = "full"
+    
+    prompts = [build_idea_prompt(components_str, **shard) for shard in shards]
+    info = {
+        "input_tokens": sum(system_tokens() + count_tokens(prompt) for prompt in prompts),
+        "components": strategy,
+    }
+    return prompts, info
 
-@app.post("/api/generate-ideas")
-async def generate_ideas(request: GenerationRequest):
+def record_upstream_call(model: str, prompt: str, completion: Optional[str], started: float) -> None:
+    """Record latency, outcome and estimated tokens for one upstream LLM call"""
+    latency = time.perf_counter() - started
+    exchange_capture.capture(model, prompt, completion, latency)
+    model_router.record(model, latency, completion is not None)
+    LLM_LATENCY.observe(latency, model=model)
+    LLM_REQUESTS.inc(model=model, outcome="success" if completion is not None else "error")
+    LLM_TOKENS.inc(system_tokens() + count_tokens(prompt), direction="prompt")
+    if completion is not None:
+        LLM_TOKENS.inc(count_tokens(completion), direction="completion")
+
+async def send_prompt(prompt: str, model_id: str) -> Tuple[str, str]:
+    """Send one prompt upstream and return (raw response, model that answered).
+
+    Each candidate model is tried with retries; when one fails its next
+    configured failover model is used.
+    """
+    get_llm_api_key()
+    last_error = None
+    for model in model_router.candidates(model_id, available=llm_upstream.available):
+        pool = model_router.pool(model)
+        
+        async def attempt() -> str:
+            started = time.perf_counter()
+            llm_response = None
+            try:
+                # A session that raised is discarded by the pool, so each retry gets a fresh one
+                async with pool.session() as chat:
+                    llm_response = await chat.send_message(user_message(prompt))
+                return llm_response
+            finally:
+                record_upstream_call(model, prompt, llm_response, started)
+        
+        try:
+            return await llm_upstream.call(model, attempt), model
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            logger.warning("Model %s failed: %s", model, e)
+            last_error = e
+    raise last_error
+
+async def generate_fanned_out_projects(prompts: List[str], count: Any, model_id: str):
+    """Run shard prompts concurrently and merge their de-duplicated (project, model) pairs"""
+    with generation_stage("upstream"):
+        results = await gather_bounded([send_prompt(prompt, model_id) for prompt in prompts], FANOUT_CONCURRENCY)
+    
+    projects = []
+    errors = []
+    report = {"salvaged": 0, "truncated": False, "partial": False}
+    with generation_stage("parse"):
+        for result in results:
+            if isinstance(result, BaseException):
+                errors.append(result)
+                continue
+            llm_response, model = result
+            try:
+                parsed = parse_projects(llm_response)
+            except ProjectParseError as e:
+                errors.append(e)
+                continue
+            projects.extend((project, model) for project in parsed.projects)
+            report["salvaged"] += parsed.salvaged
+            report["truncated"] = report["truncated"] or parsed.truncated
+    
+    if not projects:
+        if errors and not isinstance(errors[0], ProjectParseError):
+            raise errors[0]
+        raise HTTPException(status_code=500, detail="Failed to parse AI response")
+    if len(errors):
+        logger.warning("Fan-out: %d/%d shards failed: %s", len(errors), len(prompts), errors[0])
+        report["partial"] = True
+    
+    deduper = ProjectDeduper()
+    merged = []
+    for project, model in projects:
+        if len(merged) >= int(count):
+            break
+        if deduper.accept(project):
+            merged.append((project, model))
+    return merged, report
+
+def lookup_cached_ideas(request: GenerationRequest, cache_key: str, component_names: List[str], model_id: str):
+    """Return (cached ideas or None, X-Cache status, similarity) for a generation request"""
+    if not (request.use_cache and idea_cache.enabled):
+        return None, "BYPASS", None
+    cached_ideas = idea_cache.get(cache_key)
+    if cached_ideas is not None:
+        return cached_ideas, "HIT", None
+    
+    if request.allow_similar and similar_ideas.enabled:
+        similar_key, similarity = similar_ideas.lookup(component_names, request.preferences, model_id)
+        if similar_key is not None:
+            cached_ideas = idea_cache.get(similar_key)
+            if cached_ideas is not None:
+                return cached_ideas, "SIMILAR", similarity
+            # Expired or evicted from the idea cache
+            similar_ideas.discard(similar_key)
+    return None, "MISS", None
+
+def cache_ideas(cache_key: str, ideas: List[Dict[str, Any]], component_names: List[str],
+                preferences: Dict[str, Any], model_id: str) -> None:
+    """Cache ideas for exact and near-duplicate lookups"""
+    idea_cache.set(cache_key, ideas)
+    similar_ideas.add(cache_key, component_names, preferences, model_id)
+
+async def iter_llm_chunks(chat, user_message, model: str) -> AsyncIterator[str]:
+    """Yield model output as it arrives.
+
+    Clients exposing a streaming stream_message() are consumed chunk by chunk;
+    otherwise the complete send_message() response is yielded once.
+    """
+    started = time.perf_counter()
+    completion = None
+    try:
+        stream_message = getattr(chat, "stream_message", None)
+        if stream_message is not None:
+            received = []
+            async for chunk in stream_message(user_message):
+                received.append(chunk)
+                yield chunk
+            completion = "".join(received)
+        else:
+            completion = await chat.send_message(user_message)
+            yield completion
+    finally:
+        record_upstream_call(model, user_message.text, completion, started)
+
+async def produce_ideas(prompts: List[str], component_names: List[str], prefs: Dict[str, Any], model_id: str):
+    """Call the LLM for the planned prompts and convert the projects to ideas.
+
+    Returns (ideas, report) where report counts projects salvaged from
+    malformed or truncated output.
+    """
+    if len(prompts) > 1:
+        projects, report = await generate_fanned_out_projects(prompts, prefs["count"], model_id)
+    else:
+        # Send message on a pooled session and get response
+        with generation_stage("upstream"):
+            llm_response, model = await send_prompt(prompts[0], model_id)
+        
+        # Parse the JSON response, recovering complete projects from damaged output
+        try:
+            with generation_stage("parse"):
+                parsed = parse_projects(llm_response)
+        except ProjectParseError as e:
+            # The raw response goes to the exchange capture, not the log
+            logger.warning("JSON Parse Error: %s", e, extra={"model": model, "response_chars": len(llm_response)})
+            exchange_capture.capture(model, prompts[0], llm_response, force=True, error=str(e))
+            raise HTTPException(status_code=500, detail="Failed to parse AI response")
+        projects = [(project, model) for project in parsed.projects]
+        report = {"salvaged": parsed.salvaged, "truncated": parsed.truncated, "partial": False}
+        if parsed.salvaged or parsed.dropped:
+            logger.info("Recovered %d projects (%d salvaged, %d dropped, truncated=%s)",
+                        len(projects), parsed.salvaged, parsed.dropped, parsed.truncated)
+    
+    # Convert to IdeaResponse format
+    with generation_stage("build_ideas"):
+        ideas = [
+            build_idea(project, i, component_names, prefs["theme"], prefs["skill_level"], model)
+            for i, (project, model) in enumerate(projects)
+        ]
+    return ideas, report
+
+async def generate_and_store(request: GenerationRequest, prompts: List[str], cache_key: str,
+                             component_names: List[str], prefs: Dict[str, Any], model_id: str):
+    """Generate ideas for planned prompts, then cache and persist them"""
+    ideas, report = await produce_ideas(prompts, component_names, prefs, model_id)
+    if len(ideas) < int(prefs["count"]):
+        report["partial"] = True
+    # Truncated or partial output is served but not cached, so the next request retries
+    if request.use_cache and ideas and not (report["truncated"] or report["partial"]):
+        cache_ideas(cache_key, ideas, component_names, request.preferences, model_id)
+    if ideas:
+        persist_ideas(ideas)
+    return ideas, report
+
+def diagnostic_headers(response: Response) -> Dict[str, str]:
+    """The X- headers a generation set on its response"""
+    return {name: value for name, value in response.headers.items() if name.startswith("x-")}
+
+@app.post("/api/generate-ideas", dependencies=[Depends(rate_limited)])
+async def generate_ideas_endpoint(request: GenerationRequest, http_request: Request, fields: Optional[str] = None):
+    """Generate project ideas, projected onto fields= and encoded as the client accepts"""
+    response = Response()
+    ideas = await generate_ideas(request, response)
+    return negotiated_response(http_request, ideas, fields, diagnostic_headers(response))
+
+async def generate_ideas(request: GenerationRequest, response: Response):
     """Generate project ideas using Emergent LLM"""
     try:
         if not EMERGENT_AVAILABLE:
             raise HTTPException(status_code=500, detail="Emergent LLM integration not available")
         
         # Extract preferences
-        preferences = request.preferences
-        theme = preferences.get('theme', 'General')
-        skill_level = preferences.get('skillLevel', 'Beginner')
-        count = preferences.get('count', 5)
-        duration = preferences.get('duration', '1-2 hours')
-        team_size = preferences.get('teamSize', 'Individual')
+        prefs = extract_preferences(request.preferences)
+        model_id = resolve_model(request.model_id)
         
         # Extract component names
         component_names = [comp.get('name', str(comp)) for comp in request.selected_components]
-        components_str = ", ".join(component_names)
         
-        # Create the prompt
-        user_prompt = f"""Using your reasoning capabilities, analyze these components and create {count} innovative electronics project ideas: {components_str}
-
-Project Context & Requirements:
-- Theme Focus: {theme}
-- Target Skill Level: {skill_level}  
-- Project Duration: {duration}
-- Team Configuration: {team_size}
-- Priority: Educational value + practical real-world application
-
-Think through each project systematically:
-1. What real problem can these components solve?
-2. How do the components work together technically?
-3. What makes this project innovative and educational?
-4. Is it appropriate for the {skill_level} skill level?
-5. What can be learned from building this?
-
-Required JSON Response Format:
-{{
-  "projects": [
-    {{
-      "title": "Creative and descriptive project name",
-      "description": "Clear 2-3 sentence overview of what the project does",
-      "problem_statement": "Specific real-world problem this project addresses",
-      "working_principle": "Technical explanation of how the system operates",
-      "components": ["Array", "of", "required", "components", "from", "available", "list"],
-      "difficulty": "{skill_level}",
-      "estimated_cost": "₹realistic cost range based on components",
-      "innovation_elements": ["unique", "creative", "features"],
-      "scalability_options": ["ways", "to", "expand", "the", "project"],
-      "learning_outcomes": ["specific", "skills", "and", "concepts", "learned"],
-      "tags": ["relevant", "technical", "keywords"]
-    }}
-  ]
-}}
-
-Quality Requirements for Each Project:
-✅ Technically feasible with given components
-✅ Educationally valuable for {skill_level} makers
-✅ Solves a genuine real-world problem
-✅ Creative and engaging to build
-✅ Clear learning progression and outcomes
-✅ Appropriate complexity for {duration} timeframe
-✅ Suitable for {team_size} work style
-
-Use your reasoning to ensure each project meets all these criteria."""
-
-        # Get LLM chat instance
-        chat = get_llm_chat()
+        # Serve identical requests from the cache
+        with generation_stage("cache_lookup"):
+            cache_key = make_cache_key(component_names, request.preferences, model_id)
+            cached_ideas, cache_status, similarity = lookup_cached_ideas(request, cache_key, component_names, model_id)
+        if request.use_cache:
+            pregenerator.record(cache_key, request)
+        response.headers["X-Cache"] = cache_status
+        if similarity is not None:
+            response.headers["X-Cache-Similarity"] = f"{similarity:.3f}"
+        if cached_ideas is not None:
+            return cached_ideas
         
-        # Create user message
-        user_message = UserMessage(text=user_prompt)
+        # Answer from stored ideas needing only the selected parts, if there are enough of them
+        if request.reuse_existing:
+            with generation_stage("reuse_lookup"):
+                wanted = int(prefs["count"]) if str(prefs["count"]).isdigit() else 0
+                reusable, _ = await find_buildable_ideas(request.selected_components, 0, wanted, prefs["skill_level"])
+            if wanted and len(reusable) >= wanted:
+                response.headers["X-Cache"] = "REUSED"
+                return [{key: value for key, value in idea.items() if key != "missing_components"} for idea in reusable]
         
-        # Send message and get response
-        response = await chat.send_message(user_message)
+        # Create the prompt, split into shards for large counts
+        with generation_stage("prompt_build"):
+            prompts, prompt_info = plan_generation_prompts(request.selected_components, prefs, request.fan_out)
+        response.headers["X-Fanout-Shards"] = str(len(prompts))
+        response.headers["X-Prompt-Tokens"] = str(prompt_info["input_tokens"])
+        response.headers["X-Prompt-Components"] = prompt_info["components"]
         
-        # Parse the JSON response
+        async def produce():
+            return await generate_and_store(request, prompts, cache_key, component_names, prefs, model_id)
+        
+        # Identical concurrent requests share one upstream generation, bounded by the request deadline
         try:
-            parsed_response = json.loads(response)
-            projects = parsed_response.get('projects', [])
-            
-            # Convert to IdeaResponse format
-            ideas = []
-            for i, project in enumerate(projects):
-                idea = IdeaResponse(
-                    id=f"generated_{int(datetime.now().timestamp())}_{i}",
-                    title=project.get('title', f'Untitled Project {i+1}'),
-                    description=project.get('description', 'No description provided'),
-                    problem_statement=project.get('problem_statement', ''),
-                    working_principle=project.get('working_principle', ''),
-                    components=project.get('components', component_names),
-                    difficulty=project.get('difficulty', skill_level),
-                    estimated_cost=project.get('estimated_cost', '₹500-1000'),
-                    innovation_elements=project.get('innovation_elements', []),
-                    scalability_options=project.get('scalability_options', []),
-                    learning_outcomes=project.get('learning_outcomes', []),
-                    tags=project.get('tags', [theme, skill_level]),
-                    availability="Available",
-                    is_favorite=False,
-                    created_at=datetime.now().isoformat(),
-                    updated_at=datetime.now().isoformat(),
-                    generated_by="gpt-4o-mini"
-                )
-                ideas.append(idea.dict())
-            
-            return ideas
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON Parse Error: {e}")
-            print(f"Raw response: {response}")
-            raise HTTPException(status_code=500, detail="Failed to parse AI response")
-            
+            with deadline(GENERATION_DEADLINE_SECONDS):
+                (ideas, report), coalesced = await generation_flights.do(cache_key, produce, timeout=COALESCE_WAIT_TIMEOUT)
+        except (asyncio.TimeoutError, DeadlineExceededError):
+            raise HTTPException(status_code=504, detail="Timed out waiting for idea generation")
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+        response.headers["X-Coalesced"] = "true" if coalesced else "false"
+        response.headers["X-Ideas-Salvaged"] = str(report["salvaged"])
+        response.headers["X-Ideas-Truncated"] = "true" if report["truncated"] else "false"
+        # Near-duplicates across shards are dropped, which can leave fewer ideas than requested
+        response.headers["X-Ideas-Shortfall"] = str(max(0, int(prefs["count"]) - len(ideas)))
+        
+        return ideas
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Generate ideas error: {e}")
+        logger.exception("Generate ideas error")
         raise HTTPException(status_code=500, detail=f"Failed to generate ideas: {str(e)}")
 
+async def run_generation_job(payload: Tuple[str, GenerationRequest]) -> Dict[str, Any]:
+    """Run generate_ideas for a queued job, keeping its diagnostic headers"""
+    client, request = payload
+    response = Response()
+    with client_context(client):
+        ideas = await generate_ideas(request, response)
+    return {"ideas": ideas, "headers": diagnostic_headers(response)}
+
+# Background generation jobs, polled by id
+generation_jobs = JobQueue(
+    run_generation_job,
+    workers=int(os.environ.get('JOB_WORKERS', '4')),
+    max_pending=int(os.environ.get('JOB_QUEUE_MAX_PENDING', '1000')),
+    ttl_seconds=float(os.environ.get('JOB_RESULT_TTL_SECONDS', '3600')),
+)
+
+async def pregenerate_ideas(request: GenerationRequest) -> int:
+    """Refresh the cached ideas for a popular request; returns the estimated upstream tokens used"""
+    prefs = extract_preferences(request.preferences)
+    model_id = resolve_model(request.model_id)
+    component_names = [comp.get('name', str(comp)) for comp in request.selected_components]
+    cache_key = make_cache_key(component_names, request.preferences, model_id)
+    prompts, prompt_info = plan_generation_prompts(request.selected_components, prefs, request.fan_out)
+    
+    async def produce():
+        return await generate_and_store(request, prompts, cache_key, component_names, prefs, model_id)
+    
+    # Live requests for the same key join this generation rather than starting their own
+    try:
+        with client_context("pregeneration"), deadline(GENERATION_DEADLINE_SECONDS):
+            (ideas, _), _ = await generation_flights.do(cache_key, produce)
+    except (asyncio.CancelledError, CircuitOpenError):
+        raise
+    except Exception as e:
+        # The prompts were most likely sent, so their tokens are spent
+        raise PregenerationError(getattr(e, "detail", None) or str(e), prompt_info["input_tokens"]) from e
+    return prompt_info["input_tokens"] + count_tokens(json.dumps(ideas, ensure_ascii=False))
+
+# Upstream calls in flight at or below which live traffic counts as idle
+PREGENERATE_IDLE_MAX_IN_FLIGHT = int(os.environ.get('PREGENERATE_IDLE_MAX_IN_FLIGHT', '0'))
+
+def upstream_idle() -> bool:
+    """True while live traffic leaves the upstream (nearly) unused"""
+    return (llm_upstream.in_flight <= PREGENERATE_IDLE_MAX_IN_FLIGHT
+            and llm_upstream.waiting == 0)
+
+# Worker processes serving the app; start.py sets this in production mode
+WEB_WORKERS = max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+
+# Refreshes cached ideas for popular requests during idle periods (PREGENERATE_TOP_N=0 disables).
+# Each worker keeps its own cache warm, so the hourly budget is split between workers.
+pregenerator = PregenerationScheduler(
+    pregenerate_ideas,
+    ttl_remaining=idea_cache.ttl_remaining,
+    idle=upstream_idle,
+    top_n=int(os.environ.get('PREGENERATE_TOP_N', '20')) if idea_cache.enabled else 0,
+    interval=float(os.environ.get('PREGENERATE_INTERVAL_SECONDS', '30')),
+    min_score=float(os.environ.get('PREGENERATE_MIN_REQUESTS', '3')),
+    refresh_seconds=float(os.environ.get('PREGENERATE_REFRESH_SECONDS', '300')),
+    token_budget_per_hour=float(os.environ.get('PREGENERATE_TOKEN_BUDGET_PER_HOUR', '50000')) / WEB_WORKERS,
+    half_life_seconds=float(os.environ.get('PREGENERATE_HALF_LIFE_SECONDS', '3600')),
+)
+
+@app.post("/api/generate-ideas/jobs", status_code=202)
+async def create_generation_job(request: GenerationRequest, client: str = Depends(rate_limited)):
+    """Queue an idea generation and return its job id immediately"""
+    try:
+        job = generation_jobs.submit((client, request))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Generation queue is full: {e}", headers={"Retry-After": "5"})
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/generate-ideas/jobs/{job.id}",
+    }
+
+@app.get("/api/generate-ideas/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """Get the status of a generation job, with its ideas once it has succeeded"""
+    job = generation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return {**job.to_dict(), "queue_position": generation_jobs.position(job)}
+
+@app.post("/api/generate-ideas/batch")
+async def generate_ideas_batch(batch: BatchGenerationRequest, http_request: Request):
+    """Generate ideas for many component sets, streaming one NDJSON line per item as it completes"""
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one request")
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch is limited to {BATCH_MAX_ITEMS} requests")
+    
+    # Identical entries are generated once and answered for every index that asked
+    indices_by_key: Dict[str, List[int]] = {}
+    for index, item in enumerate(batch.requests):
+        component_names = [comp.get('name', str(comp)) for comp in item.selected_components]
+        key = make_cache_key(component_names, item.preferences, item.model_id)
+        indices_by_key.setdefault(key, []).append(index)
+    
+    # Each distinct generation counts against the caller's quota
+    admit_client(http_request, cost=len(indices_by_key))
+    
+    def encode_event(event: str, data: Any) -> str:
+        return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+    
+    async def events():
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def run_item(indices: List[int]):
+            async with limit:
+                item_response = Response()
+                try:
+                    ideas = await generate_ideas(batch.requests[indices[0]], item_response)
+                except HTTPException as e:
+                    return indices, {"status_code": e.status_code, "detail": e.detail}
+                return indices, {"status_code": 200, "cache": item_response.headers.get("x-cache"), "ideas": ideas}
+        
+        tasks = [asyncio.create_task(run_item(indices)) for indices in indices_by_key.values()]
+        succeeded = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, result = await next_done
+                for index in indices:
+                    if result["status_code"] == 200:
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    yield encode_event("item", {"index": index, **result})
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        yield encode_event("done", {
+            "count": len(batch.requests),
+            "unique": len(indices_by_key),
+            "succeeded": succeeded,
+            "failed": failed,
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Batch-Unique": str(len(indices_by_key))},
+    )
+
+@app.post("/api/generate-ideas/stream", dependencies=[Depends(rate_limited)])
+async def generate_ideas_stream(request: GenerationRequest, http_request: Request, format: Optional[str] = None):
+    """Stream project ideas as NDJSON lines or server-sent events as each one is parsed"""
+    if not EMERGENT_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Emergent LLM integration not available")
+    
+    use_sse = format == "sse" or (format is None and "text/event-stream" in http_request.headers.get("accept", ""))
+    
+    def encode_event(event: str, data: Any) -> str:
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+    
+    prefs = extract_preferences(request.preferences)
+    model_id = resolve_model(request.model_id)
+    component_names = [comp.get('name', str(comp)) for comp in request.selected_components]
+    cache_key = make_cache_key(component_names, request.preferences, model_id)
+    cached_ideas, cache_status, similarity = lookup_cached_ideas(request, cache_key, component_names, model_id)
+    if request.use_cache:
+        pregenerator.record(cache_key, request)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Cache": cache_status}
+    if similarity is not None:
+        headers["X-Cache-Similarity"] = f"{similarity:.3f}"
+    if cached_ideas is None:
+        # A stream can't switch models once output has started, so pick the best candidate up front
+        get_llm_api_key()
+        model = model_router.candidates(model_id, available=llm_upstream.available)[0]
+        pool = model_router.pool(model)
+        prompts, prompt_info = plan_generation_prompts(request.selected_components, prefs, request.fan_out)
+        headers["X-Prompt-Tokens"] = str(prompt_info["input_tokens"])
+        headers["X-Prompt-Components"] = prompt_info["components"]
+    
+    async def events():
+        if cached_ideas is not None:
+            for idea in cached_ideas:
+                yield encode_event("idea", idea)
+            yield encode_event("done", {"count": len(cached_ideas), "cached": True})
+            return
+        
+        shard_limit = asyncio.Semaphore(FANOUT_CONCURRENCY)
+        projects_queue: asyncio.Queue = asyncio.Queue()
+        
+        async def run_shard(prompt: str):
+            try:
+                parser = ProjectStreamParser()
+                chunks = []
+                streamed = 0
+                async with shard_limit, llm_upstream.stream_slot(model), pool.session() as chat:
+                    async for chunk in iter_llm_chunks(chat, user_message(prompt), model):
+                        chunks.append(chunk)
+                        for project in parser.feed(chunk):
+                            project = normalize_project(project)
+                            if project is not None:
+                                streamed += 1
+                                await projects_queue.put(project)
+                truncated = not parser.finished
+                if not streamed:
+                    # Not a "projects" object (bare list, fenced or renamed key): parse the whole reply
+                    try:
+                        parsed = parse_projects("".join(chunks))
+                    except ProjectParseError:
+                        parsed = None
+                    if parsed is not None:
+                        truncated = parsed.truncated
+                        for project in parsed.projects:
+                            await projects_queue.put(project)
+                if truncated:
+                    truncated_shards.append(prompt)
+                await projects_queue.put(None)
+            except Exception as e:
+                await projects_queue.put(e)
+        
+        truncated_shards = []
+        # Shard tasks inherit the deadline from the context they are created in
+        with deadline(GENERATION_DEADLINE_SECONDS):
+            tasks = [asyncio.create_task(run_shard(prompt)) for prompt in prompts]
+            stream_deadline = remaining_time()
+        if stream_deadline is not None:
+            stream_deadline += time.monotonic()
+        deduper = ProjectDeduper()
+        ideas = []
+        errors = []
+        try:
+            remaining = len(tasks)
+            while remaining:
+                try:
+                    time_left = None if stream_deadline is None else max(0.0, stream_deadline - time.monotonic())
+                    item = await asyncio.wait_for(projects_queue.get(), time_left)
+                except asyncio.TimeoutError:
+                    errors.append(DeadlineExceededError("Request deadline exceeded while streaming ideas"))
+                    break
+                if item is None or isinstance(item, Exception):
+                    remaining -= 1
+                    if item is not None:
+                        logger.warning("Stream ideas error: %s", item)
+                        errors.append(item)
+                    continue
+                if len(prompts) > 1 and not deduper.accept(item):
+                    continue
+                idea = build_idea(item, len(ideas), component_names, prefs["theme"], prefs["skill_level"], model)
+                ideas.append(idea)
+                yield encode_event("idea", idea)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        if errors and not ideas:
+            yield encode_event("error", {"detail": f"Failed to generate ideas: {str(errors[0])}"})
+            return
+        
+        if not ideas:
+            yield encode_event("error", {"detail": "Failed to parse AI response"})
+            return
+        
+        shortfall = max(0, int(prefs["count"]) - len(ideas))
+        # Like truncated output, a stream cut short by failed shards or the deadline is not cached
+        if request.use_cache and not (truncated_shards or errors or shortfall):
+            cache_ideas(cache_key, ideas, component_names, request.preferences, model_id)
+        persist_ideas(ideas)
+        yield encode_event("done", {
+            "count": len(ideas),
+            "shortfall": shortfall,
+            "cached": False,
+            "truncated": bool(truncated_shards),
+            "input_tokens": prompt_info["input_tokens"],
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers=headers,
+    )
+
+@app.get("/api/ideas")
+async def list_ideas(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = None,
+    difficulty: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """List generated ideas, newest first; pass next_cursor back to get the next page"""
+    page = await asyncio.to_thread(idea_store.list, limit, cursor, difficulty)
+    return negotiated_response(request, page, fields)
+
+@app.get("/api/ideas/search")
+async def search_ideas(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = None,
+):
+    """Full-text search over generated ideas ranked by title, tag and description matches"""
+    results = await asyncio.to_thread(idea_store.search, q, limit, offset)
+    return negotiated_response(request, results, fields)
+
+@app.post("/api/ideas/buildable")
+async def get_buildable_ideas(request: BuildableIdeasRequest, http_request: Request, fields: Optional[str] = None):
+    """Stored ideas buildable with the given components, each listing the parts still missing"""
+    if not 0 <= request.max_missing <= 10:
+        raise HTTPException(status_code=400, detail="max_missing must be between 0 and 10")
+    if not 1 <= request.limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    ideas, total = await find_buildable_ideas(
+        request.selected_components, request.max_missing, request.limit, request.difficulty)
+    return negotiated_response(http_request, {"items": ideas, "total": total, "indexed": len(buildable_ideas)}, fields)
+
+@app.get("/api/ideas/stats")
+async def get_idea_stats():
+    """Get aggregate statistics about generated ideas"""
+    stats = await asyncio.to_thread(idea_store.stats)
+    stats["components_available"] = len(component_catalog)
+    stats["buildable_index"] = buildable_ideas.stats()
+    return stats
+
+@app.get("/api/ideas/{idea_id}")
+async def get_idea(idea_id: str, request: Request, fields: Optional[str] = None):
+    """Get a generated idea by ID"""
+    idea = await asyncio.to_thread(idea_store.get, idea_id)
+    if not idea:
+        raise HTTPException(status_code=404, detail="Idea not found")
+    return negotiated_response(request, idea, fields)
+
 @app.get("/api/test-llm")
 async def test_llm_connection():
     """Test LLM connection"""
@@ -263,15 +1376,13 @@ async def test_llm_connection():
         if not EMERGENT_AVAILABLE:
             return {"success": False, "message": "Emergent LLM integration not available"}
         
-        chat = get_llm_chat()
-        user_message = UserMessage(text="Say 'Connection successful' and nothing else.")
-        response = await chat.send_message(user_message)
+        response, model = await send_prompt("Say 'Connection successful' and nothing else.", model_router.default_model)
         
         return {
             "success": True,
             "message": "LLM connection successful",
             "response": response,
-            "model": "gpt-4o-mini"
+            "model": model
         }
     except Exception as e:
         return {
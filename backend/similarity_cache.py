@@ -0,0 +1,191 @@
+"""
+Similarity cache
+Finds past generations for near-identical requests using hashed bag-of-features vectors
+"""
+
+import hashlib
+import importlib.util
+import math
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from idea_cache import normalize_preferences
+
+# numpy is imported on first use so it doesn't slow down worker startup
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+
+
+def load_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+_WORD = re.compile(r"\w+")
+
+# Feature weights: whole component names dominate, shared words nudge
+NAME_WEIGHT = 1.0
+WORD_WEIGHT = 0.35
+
+
+def _normalize(text: Any) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def _bucket_key(preferences: Dict[str, Any], model_id: str) -> Tuple:
+    """Preferences that must match exactly for ideas to be reusable"""
+    prefs = normalize_preferences(preferences)
+    return (prefs["theme"], prefs["skillLevel"], prefs["count"], prefs["duration"], prefs["teamSize"],
+            _normalize(model_id))
+
+
+class _Bucket:
+    """Unit vectors for one exact-preference bucket, stored row-wise"""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.keys: List[str] = []
+        if NUMPY_AVAILABLE:
+            load_numpy()
+            self.matrix = np.zeros((8, dimensions), dtype=np.float32)
+        else:
+            self.rows: List[Dict[int, float]] = []
+
+    def add(self, key: str, vector: Dict[int, float]) -> None:
+        if NUMPY_AVAILABLE:
+            if len(self.keys) == len(self.matrix):
+                self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+            row = self.matrix[len(self.keys)]
+            row[:] = 0
+            for index, value in vector.items():
+                row[index] = value
+        else:
+            self.rows.append(vector)
+        self.keys.append(key)
+
+    def remove(self, key: str) -> None:
+        index = self.keys.index(key)
+        last = len(self.keys) - 1
+        # Swap with the last row so removal is O(dimensions)
+        if NUMPY_AVAILABLE:
+            self.matrix[index] = self.matrix[last]
+        else:
+            self.rows[index] = self.rows[last]
+            self.rows.pop()
+        self.keys[index] = self.keys[last]
+        self.keys.pop()
+
+    def best(self, vector: Dict[int, float]) -> Tuple[Optional[str], float]:
+        if not self.keys:
+            return None, 0.0
+        if NUMPY_AVAILABLE:
+            indices = np.fromiter(vector.keys(), dtype=np.intp, count=len(vector))
+            values = np.fromiter(vector.values(), dtype=np.float32, count=len(vector))
+            scores = self.matrix[:len(self.keys), indices] @ values
+            index = int(np.argmax(scores))
+            return self.keys[index], float(scores[index])
+        best_key, best_score = None, 0.0
+        for key, row in zip(self.keys, self.rows):
+            score = sum(value * row.get(index, 0.0) for index, value in vector.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+
+class SimilarityCache:
+    """Index of cached generations by request similarity.
+
+    Theme, skill level, count, duration, team size and model must match
+    exactly; within that bucket, requests are compared by cosine similarity
+    of their component names. Only keys are stored here — the ideas stay in
+    the exact-match cache, so its TTL and eviction apply.
+    """
+
+    def __init__(self, threshold: float = 0.85, max_entries: int = 4096, dimensions: int = 512):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dimensions = dimensions
+        self._buckets: Dict[Tuple, _Bucket] = {}
+        # key -> bucket key, oldest first
+        self._entries: "OrderedDict[str, Tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.threshold <= 1 and self.max_entries > 0
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimensions, (1.0 if value >> 63 else -1.0)
+
+    def vectorize(self, component_names: List[str]) -> Dict[int, float]:
+        """Sparse L2-normalized feature vector as {dimension: value}"""
+        features: Dict[str, float] = {}
+        for name in {_normalize(name) for name in component_names}:
+            features[f"c:{name}"] = NAME_WEIGHT
+            for word in _WORD.findall(name):
+                features[f"w:{word}"] = features.get(f"w:{word}", 0.0) + WORD_WEIGHT
+
+        vector: Dict[int, float] = {}
+        for feature, weight in features.items():
+            index, sign = self._hash(feature)
+            vector[index] = vector.get(index, 0.0) + sign * weight
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {index: value / norm for index, value in vector.items() if value} if norm else {}
+
+    def add(self, key: str, component_names: List[str], preferences: Dict[str, Any], model_id: str) -> None:
+        if not self.enabled or key in self._entries:
+            return
+        vector = self.vectorize(component_names)
+        if not vector:
+            return
+        bucket_key = _bucket_key(preferences, model_id)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = _Bucket(self.dimensions)
+        bucket.add(key, vector)
+        self._entries[key] = bucket_key
+        while len(self._entries) > self.max_entries:
+            self.discard(next(iter(self._entries)))
+
+    def lookup(self, component_names: List[str], preferences: Dict[str, Any],
+               model_id: str) -> Tuple[Optional[str], float]:
+        """Return (key, similarity) of the closest cached request above threshold, or (None, best score)"""
+        bucket = self._buckets.get(_bucket_key(preferences, model_id)) if self.enabled else None
+        vector = self.vectorize(component_names) if bucket else {}
+        key, score = bucket.best(vector) if vector else (None, 0.0)
+        if key is None or score < self.threshold:
+            self.misses += 1
+            return None, score
+        self.hits += 1
+        return key, score
+
+    def discard(self, key: str) -> None:
+        bucket_key = self._entries.pop(key, None)
+        if bucket_key is None:
+            return
+        bucket = self._buckets[bucket_key]
+        bucket.remove(key)
+        if not bucket.keys:
+            del self._buckets[bucket_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "numpy": NUMPY_AVAILABLE,
+        }
@@ -0,0 +1,242 @@
+"""
+Structured logging
+Queue-backed JSON-lines logging with request ids, and sampled compressed capture of LLM exchanges
+"""
+
+import copy
+import gzip
+import importlib.util
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional
+
+ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+
+# Fields of the request being served (request_id, stage timings), shared with tasks it spawns
+request_fields: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_fields", default=None)
+
+# LogRecord attributes that aren't caller-supplied extra fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def current_request_id() -> Optional[str]:
+    fields = request_fields.get()
+    return fields.get("request_id") if fields else None
+
+
+@contextmanager
+def log_stage(name: str) -> Iterator[None]:
+    """Add the time spent in this block to the current request's stage timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        fields = request_fields.get()
+        if fields is not None:
+            stages = fields.setdefault("stages_ms", {})
+            stages[name] = round(stages.get(name, 0.0) + (time.perf_counter() - started) * 1000, 1)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Formats arguments in the caller but never waits on I/O: full queues drop records"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Route records through a bounded in-memory queue to handlers run by one background thread"""
+
+    def __init__(self, handlers: List[logging.Handler], max_queue: int = 10000):
+        self.handler = _NonBlockingQueueHandler(queue.Queue(max_queue))
+        self.listener = QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+
+    def start(self) -> None:
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the writer thread"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", max_queue: int = 10000) -> LogPipeline:
+    """Send the root logger's records to stdout through a LogPipeline"""
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    pipeline = LogPipeline([stream], max_queue)
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(pipeline.handler)
+    pipeline.start()
+    return pipeline
+
+
+class RequestLogMiddleware:
+    """ASGI middleware giving each request an id (X-Request-ID) and logging one line when it completes"""
+
+    def __init__(self, app, logger_name: str = "http"):
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or ()).get(b"x-request-id", b"").decode("latin-1")
+        # Accept a caller's id only if it is short and printable, so it can't forge log content
+        request_id = incoming if 0 < len(incoming) <= 64 and incoming.isprintable() else uuid.uuid4().hex
+        fields: Dict[str, Any] = {"request_id": request_id}
+        token = request_fields.set(fields)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.logger.info("request", extra={
+                "method": scope.get("method", ""),
+                "route": getattr(route, "path", scope.get("path", "")),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                **{key: value for key, value in fields.items() if key != "request_id"},
+            })
+            request_fields.reset(token)
+
+
+def _compress(source: str, destination: str) -> None:
+    if destination.endswith(".zst"):
+        import zstandard
+        with open(source, "rb") as raw, open(destination, "wb") as compressed:
+            zstandard.ZstdCompressor(level=10).copy_stream(raw, compressed)
+    else:
+        with open(source, "rb") as raw, gzip.open(destination, "wb") as compressed:
+            shutil.copyfileobj(raw, compressed)
+    os.remove(source)
+
+
+class ExchangeCapture:
+    """Sampled prompt/response pairs written as JSON lines to size-rotated files.
+
+    The live file is plain text; rotated files are compressed with zstd when
+    the zstandard package is installed, gzip otherwise. Writing and compression
+    happen on the pipeline's background thread.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 20, max_queue: int = 1000):
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.captured = 0
+        self.pipeline: Optional[LogPipeline] = None
+        if not self.enabled:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        extension = ".zst" if ZSTD_AVAILABLE else ".gz"
+        handler = RotatingFileHandler(os.path.join(directory, "exchanges.jsonl"), maxBytes=max_bytes,
+                                      backupCount=backups, encoding="utf-8", delay=True)
+        handler.namer = lambda name: name + extension
+        handler.rotator = _compress
+        handler.setFormatter(JsonFormatter())
+        self.pipeline = LogPipeline([handler], max_queue)
+        self._logger = logging.getLogger("llm.exchanges")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self.pipeline.handler)
+        self.pipeline.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def capture(self, model: str, prompt: str, response: Optional[str], latency: Optional[float] = None,
+                force: bool = False, **fields: Any) -> None:
+        """Record an exchange if it is sampled (or force is set, e.g. for parse failures)"""
+        if not self.enabled or not (force or random.random() < self.sample_rate):
+            return
+        self.captured += 1
+        self._logger.info("llm_exchange", extra={
+            "exchange_id": uuid.uuid4().hex,
+            "model": model,
+            "latency_ms": round(latency * 1000, 1) if latency is not None else None,
+            "prompt": prompt,
+            "response": response,
+            **fields,
+        })
+
+    def stop(self) -> None:
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "captured": self.captured,
+            "dropped": self.pipeline.dropped if self.pipeline else 0,
+            "compression": "zstd" if ZSTD_AVAILABLE else "gzip",
+        }
@@ -0,0 +1,47 @@
+import pytest
+
+import buildable_index
+from buildable_index import BuildableIndex
+
+CATALOG = {"arduino uno": "c1", "led": "c2"}
+
+
+def resolve(name):
+    return CATALOG.get(" ".join(str(name).split()).casefold())
+
+
+def rows(*ideas):
+    return lambda after: [idea for idea in ideas if idea[0] > after]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"], autouse=True)
+def numpy_path(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(buildable_index, "NUMPY_AVAILABLE", False)
+    elif not buildable_index.NUMPY_AVAILABLE:
+        pytest.skip("numpy is not installed")
+
+
+def test_empty_index_queries_without_allocating():
+    index = BuildableIndex(resolve)
+    assert index.query(["c1"]) == ([], 0)
+    assert index.stats()["ideas"] == 0
+
+
+def test_query_orders_by_missing_then_newest():
+    index = BuildableIndex(resolve)
+    fetch = rows(
+        (1, "a", "Beginner", ["Arduino Uno", "LED"]),
+        (2, "b", "Beginner", ["Arduino  UNO", "Servo"]),
+        (3, "c", "Advanced", ["LED"]),
+    )
+    assert index.sync(fetch) == 3
+    results, total = index.query(["c1", "c2"], max_missing=1)
+    assert total == 3
+    assert [idea_id for idea_id, _ in results] == ["c", "a", "b"]
+    assert results[2][1] == ["name:servo"]
+
+    results, total = index.query(["c1", "c2"], difficulty=" beginner ")
+    assert (results, total) == ([("a", [])], 1)
+    # Already synced rows are not appended twice
+    assert index.sync(fetch) == 0
@@ -0,0 +1,33 @@
+from component_catalog import ComponentCatalog
+
+COMPONENTS = [
+    {"id": "servo", "name": "Servo Motor", "category": "Actuators", "description": "Positional motor"},
+    {"id": "dc", "name": "DC Motor", "category": "Actuators", "description": "Spins continuously"},
+    {"id": "driver", "name": "L298N Driver", "category": "Modules", "description": "Dual motor driver"},
+    {"id": "motor", "name": "Motor", "category": "Actuators", "description": "Generic"},
+    {"id": "pump", "name": "Motor Pump", "category": "Actuators", "description": "Dual impeller"},
+    {"id": "shield", "name": "Dual Motor Shield", "category": "Modules", "description": "Arduino shield"},
+]
+
+
+def names(results):
+    return [component["name"] for component in results]
+
+
+def test_exact_name_then_name_matches_then_description_matches():
+    catalog = ComponentCatalog(COMPONENTS)
+    assert names(catalog.search("motor")) == [
+        "Motor", "DC Motor", "Dual Motor Shield", "Motor Pump", "Servo Motor", "L298N Driver"]
+
+
+def test_more_name_hits_rank_first():
+    catalog = ComponentCatalog(COMPONENTS)
+    assert names(catalog.search("dual motor")) == ["Dual Motor Shield", "Motor Pump", "L298N Driver"]
+    assert names(catalog.search("mot po")) == ["Servo Motor"]
+
+
+def test_limit_and_no_match():
+    catalog = ComponentCatalog(COMPONENTS)
+    assert len(catalog.search("motor", limit=2)) == 2
+    assert catalog.search("zzz") == []
+    assert catalog.search("  ") == []
@@ -0,0 +1,24 @@
+from component_store import ComponentStore
+
+
+def test_load_skips_malformed_lines(tmp_path, caplog):
+    path = tmp_path / "components.jsonl"
+    path.write_text(
+        '{"id": "led", "name": "LED", "category": "Output"}\n'
+        '{"id": "broken", "name": \n'
+        '{"name": "No Id", "category": "Output"}\n'
+        '\n'
+        '[1, 2]\n'
+        '{"id": "servo", "name": "Servo", "category": "Actuators", "description": null}\n',
+        encoding="utf-8",
+    )
+    components = ComponentStore(str(path)).load()
+    assert [component["id"] for component in components] == ["led", "servo"]
+    assert components[1]["description"] == ""
+    assert "line 2" in caplog.text and "line 3" in caplog.text and "line 5" in caplog.text
+
+
+def test_save_then_load_round_trips(tmp_path):
+    store = ComponentStore(str(tmp_path / "components.jsonl"))
+    store.save([{"id": "led", "name": "LED", "category": "Output", "description": "Light"}])
+    assert store.load() == [{"id": "led", "name": "LED", "category": "Output", "description": "Light"}]
@@ -0,0 +1,56 @@
+import json
+
+import msgpack
+from starlette.requests import Request
+
+from encoded_payloads import MSGPACK_MEDIA_TYPE, PayloadCache, negotiate_media_type, parse_fields, project
+
+IDEAS = [{"id": "a", "title": "Plant Monitor", "description": "x" * 2000, "tags": ["iot"]}]
+
+
+def request(**headers) -> Request:
+    return Request({"type": "http", "headers": [(name.replace("_", "-").encode(), value.encode())
+                                                for name, value in headers.items()]})
+
+
+def test_projection_keeps_id_and_applies_to_pages():
+    fields = parse_fields("title, tags,")
+    assert fields == ("id", "tags", "title")
+    assert project(IDEAS, fields) == [{"id": "a", "title": "Plant Monitor", "tags": ["iot"]}]
+    assert project({"items": IDEAS, "total": 1}, ("id",)) == {"items": [{"id": "a"}], "total": 1}
+    assert parse_fields("") is None and project(IDEAS, None) is IDEAS
+
+
+def test_negotiation_prefers_json_unless_msgpack_ranks_higher():
+    assert negotiate_media_type("application/msgpack") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type("application/x-msgpack, application/json;q=0.5") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type("application/json, application/msgpack;q=0.5") == "application/json"
+    assert negotiate_media_type("*/*") == "application/json"
+
+
+def test_cached_msgpack_projection():
+    cache = PayloadCache()
+    response = cache.respond(request(accept="application/msgpack"), 1, "ideas", lambda: IDEAS, "title")
+    assert response.media_type == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(response.body) == [{"id": "a", "title": "Plant Monitor"}]
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+
+
+def test_not_modified_echoes_matched_variant():
+    cache = PayloadCache(min_compress_bytes=100)
+    gzipped = cache.respond(request(accept_encoding="gzip"), 1, "ideas", lambda: IDEAS)
+    etag = gzipped.headers["etag"]
+    assert etag.endswith('-gzip"')
+    not_modified = cache.respond(request(accept_encoding="gzip", if_none_match=etag), 1, "ideas", lambda: IDEAS)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+
+def test_brotli_preferred_when_accepted():
+    import brotli
+
+    cache = PayloadCache(min_compress_bytes=100)
+    response = cache.respond(request(accept_encoding="gzip, br"), 1, "ideas", lambda: IDEAS)
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"].endswith('-br"')
+    assert json.loads(brotli.decompress(response.body)) == IDEAS
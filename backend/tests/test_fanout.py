@@ -0,0 +1,12 @@
+from fanout import DIVERSITY_HINTS, plan_shards, shard_focus
+
+
+def test_plan_shards_splits_evenly():
+    assert plan_shards(10, 3) == [3, 3, 2, 2]
+    assert plan_shards(0, 3) == []
+
+
+def test_shard_focus_is_unique_past_the_last_hint():
+    foci = [shard_focus(i) for i in range(3 * len(DIVERSITY_HINTS))]
+    assert len(set(foci)) == len(foci)
+    assert foci[:len(DIVERSITY_HINTS)] == DIVERSITY_HINTS
@@ -0,0 +1,82 @@
+import pytest
+
+import idea_cache
+from idea_cache import IdeaCache, make_cache_key
+
+IDEAS = [{"title": "Line follower", "difficulty": "Beginner"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(idea_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = IdeaCache(ttl_seconds=60)
+    cache.set("k", IDEAS)
+    clock[0] += 59
+    assert cache.get("k") == IDEAS
+    assert cache.ttl_remaining("k") == pytest.approx(1)
+    clock[0] += 1
+    assert cache.ttl_remaining("k") is None
+    assert cache.get("k") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+
+def test_returns_copies():
+    cache = IdeaCache()
+    ideas = [dict(idea) for idea in IDEAS]
+    cache.set("k", ideas)
+    ideas[0]["title"] = "changed"
+    cache.get("k")[0]["title"] = "changed too"
+    assert cache.get("k") == IDEAS
+
+
+def test_evicts_least_recently_used_by_count():
+    cache = IdeaCache(max_entries=2)
+    cache.set("a", IDEAS)
+    cache.set("b", IDEAS)
+    cache.get("a")
+    cache.set("c", IDEAS)
+    assert cache.get("b") is None
+    assert cache.get("a") == IDEAS and cache.get("c") == IDEAS
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_size_and_skips_oversized_entries():
+    entry_bytes = len(idea_cache.json.dumps(IDEAS, ensure_ascii=False).encode("utf-8"))
+    cache = IdeaCache(max_bytes=2 * entry_bytes)
+    cache.set("a", IDEAS)
+    cache.set("b", IDEAS)
+    cache.set("c", IDEAS)
+    assert len(cache) == 2 and cache.get("a") is None
+    cache.set("big", IDEAS * 3)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 2 * entry_bytes
+
+
+def test_stats_count_hits_and_misses():
+    cache = IdeaCache()
+    cache.set("k", IDEAS)
+    cache.get("k")
+    cache.get("k")
+    cache.get("missing")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["hit_ratio"] == pytest.approx(2 / 3)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = IdeaCache(ttl_seconds=0)
+    cache.set("k", IDEAS)
+    assert not cache.enabled
+    assert cache.get("k") is None
+
+
+def test_cache_key_ignores_order_case_and_unused_preferences():
+    key = make_cache_key(["LED", "Arduino  Uno"], {"theme": "Robotics", "count": "3", "color": "red"}, "gpt-4o")
+    assert key == make_cache_key(["arduino uno", "led"], {"theme": " robotics ", "count": 3}, "GPT-4o")
+    assert key != make_cache_key(["arduino uno", "led"], {"theme": "robotics", "count": 4}, "gpt-4o")
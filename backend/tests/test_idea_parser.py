@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from idea_parser import ProjectParseError, parse_projects
+
+PROJECT = {"title": "Plant Monitor", "description": "Waters plants", "tags": ["iot"]}
+
+
+def test_plain_object():
+    parsed = parse_projects(json.dumps({"projects": [PROJECT]}))
+    assert [project["title"] for project in parsed.projects] == ["Plant Monitor"]
+    assert parsed.salvaged == 0 and not parsed.truncated
+
+
+def test_fenced_object_with_prose():
+    text = "Here you go:\n```json\n" + json.dumps({"projects": [PROJECT]}) + "\n```\nEnjoy {building}!"
+    assert parse_projects(text).projects[0]["title"] == "Plant Monitor"
+
+
+def test_bare_list():
+    parsed = parse_projects(json.dumps([PROJECT, {**PROJECT, "title": "Door Alarm"}]))
+    assert [project["title"] for project in parsed.projects] == ["Plant Monitor", "Door Alarm"]
+
+
+def test_renamed_key():
+    assert parse_projects(json.dumps({"ideas": [PROJECT]})).projects[0]["title"] == "Plant Monitor"
+
+
+def test_backticks_inside_string_value():
+    project = {**PROJECT, "working_principle": "Flash it with:\n```cpp\nvoid loop() {}\n```"}
+    parsed = parse_projects(json.dumps({"projects": [project]}))
+    assert parsed.projects[0]["working_principle"] == project["working_principle"]
+
+
+def test_truncated_output_is_salvaged():
+    text = json.dumps({"projects": [PROJECT, PROJECT]})[:-20]
+    parsed = parse_projects(text)
+    assert len(parsed.projects) == 1
+    assert parsed.salvaged == 1 and parsed.truncated
+
+
+def test_no_projects():
+    with pytest.raises(ProjectParseError):
+        parse_projects("Sorry, I can't help with that.")
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from llm_upstream import CircuitOpenError, DeadlineExceededError, UpstreamClient, deadline
+from rate_limit import client_context
+
+
+async def fail():
+    raise ConnectionError("connection reset")
+
+
+async def succeed():
+    return "ok"
+
+
+def tripped_client() -> UpstreamClient:
+    """A client whose breaker for "m" has opened and is already due for a half-open trial"""
+    client = UpstreamClient(max_attempts=1, failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.call("m", fail))
+    assert client.breaker("m").state == "open"
+    time.sleep(0.06)
+    return client
+
+
+def test_expired_deadline_does_not_hold_half_open_trial():
+    client = tripped_client()
+
+    async def call_past_deadline():
+        with deadline(0.001):
+            await asyncio.sleep(0.01)
+            await client.call("m", succeed)
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(call_past_deadline())
+
+    # The trial slot is still free, so the next call closes the circuit
+    assert client.available("m")
+    assert asyncio.run(client.call("m", succeed)) == "ok"
+    assert client.breaker("m").state == "closed"
+
+
+def test_open_circuit_rejects_until_reset():
+    client = UpstreamClient(max_attempts=1, failure_threshold=1, reset_timeout=60)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.call("m", fail))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.call("m", succeed))
+    assert not client.available("m")
+
+
+def test_deadline_bounds_wait_for_a_slot():
+    client = UpstreamClient(max_concurrency=1, per_model_concurrency=1, max_attempts=1)
+
+    async def slow():
+        await asyncio.sleep(0.5)
+        return "slow"
+
+    async def queued_behind_slow_call():
+        holder = asyncio.create_task(client.call("m", slow))
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        with deadline(0.1):
+            with pytest.raises(DeadlineExceededError):
+                await client.call("m", succeed)
+        waited = time.monotonic() - started
+        assert await holder == "slow"
+        return waited
+
+    assert asyncio.run(queued_behind_slow_call()) < 0.3
+    assert client.in_flight == 0
+    assert client.stats()["queue"]["active"] == 0
+
+
+@pytest.mark.parametrize("max_concurrency, per_model_concurrency", [(32, 16), (16, 16), (8, 16)])
+def test_flooding_client_does_not_starve_others(max_concurrency, per_model_concurrency):
+    client = UpstreamClient(max_concurrency=max_concurrency, per_model_concurrency=per_model_concurrency)
+    finished = []
+
+    async def call(name):
+        async def work():
+            await asyncio.sleep(0.005)
+
+        with client_context(name):
+            await client.call("m", work)
+        finished.append(name)
+
+    async def flood_then_one():
+        calls = [asyncio.create_task(call("a")) for _ in range(100)]
+        await asyncio.sleep(0)
+        calls.append(asyncio.create_task(call("b")))
+        await asyncio.gather(*calls)
+
+    asyncio.run(flood_then_one())
+    # b runs in the first round of slots freed after it arrives
+    capacity = min(max_concurrency, per_model_concurrency)
+    assert finished.index("b") < 2 * capacity
+    assert client.waiting == 0
@@ -0,0 +1,30 @@
+import asyncio
+
+import mock_llm
+from mock_llm import MockLlmChat, MockLlmError, UserMessage
+
+
+def outcomes(monkeypatch, session_prefix: str):
+    monkeypatch.setenv("MOCK_LLM_FAILURE_RATE", "0.5")
+    monkeypatch.setenv("MOCK_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("MOCK_LLM_SEED", "7")
+    monkeypatch.setattr(mock_llm, "_attempts", mock_llm.Counter())
+
+    async def call(i: int) -> bool:
+        chat = MockLlmChat(session_id=f"{session_prefix}-{i}")
+        try:
+            await chat.send_message(UserMessage(f"Create 1 ideas for prompt {i % 4}"))
+        except MockLlmError:
+            return False
+        return True
+
+    async def run():
+        return [await call(i) for i in range(20)]
+
+    return asyncio.run(run())
+
+
+def test_failures_do_not_depend_on_session_ids(monkeypatch):
+    first = outcomes(monkeypatch, "a")
+    assert first == outcomes(monkeypatch, "b")
+    assert True in first and False in first
@@ -0,0 +1,23 @@
+from model_router import AUTO_MODEL, DEFAULT_FAILOVER, KNOWN_MODELS, ModelRouter, parse_failover
+
+
+def router(failover) -> ModelRouter:
+    return ModelRouter(lambda provider, model, session_id: None, KNOWN_MODELS, "gpt-4o-mini",
+                       failover=failover, min_samples=1)
+
+
+def test_default_failover_stays_in_the_same_tier():
+    models = router(parse_failover(DEFAULT_FAILOVER))
+    assert models.candidates("gpt-4o-mini") == ["gpt-4o-mini", "gemini-2.0-flash"]
+    assert models.candidates("gpt-4o") == ["gpt-4o", "claude-3-7-sonnet-20250219"]
+
+
+def test_unhealthy_targets_are_tried_last_and_unknown_ones_dropped():
+    models = router(parse_failover("gpt-4o-mini=gpt-4o|missing-model|gemini-2.0-flash"))
+    models.record("gpt-4o", 1.0, False)
+    assert models.candidates("gpt-4o-mini") == ["gpt-4o-mini", "gemini-2.0-flash", "gpt-4o"]
+
+
+def test_no_failover_entry_means_no_failover():
+    assert router({}).candidates("gpt-4o") == ["gpt-4o"]
+    assert len(router({}).candidates(AUTO_MODEL)) == len(KNOWN_MODELS)
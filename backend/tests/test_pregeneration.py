@@ -0,0 +1,47 @@
+import asyncio
+
+from pregeneration import PopularityTracker, PregenerationError, PregenerationScheduler
+
+
+def scheduler(generate, **options) -> PregenerationScheduler:
+    options = {"top_n": 5, "interval": 30, "min_score": 0.5, "token_budget_per_hour": 10000, **options}
+    return PregenerationScheduler(generate, ttl_remaining=lambda key: None, idle=lambda: True, **options)
+
+
+def test_failed_refresh_is_charged_and_backs_off():
+    calls = []
+
+    async def generate(request):
+        calls.append(request)
+        raise PregenerationError("unparseable reply", 700)
+
+    pregenerator = scheduler(generate)
+    pregenerator.record("key", "request")
+    assert asyncio.run(pregenerator.run_once()) == 0
+    assert pregenerator.failed == 1 and pregenerator.tokens_used == 700
+    # The key isn't due again until its backoff has passed
+    assert pregenerator.due() == []
+    asyncio.run(pregenerator.run_once())
+    assert len(calls) == 1
+    assert pregenerator.stats()["backing_off"] == 1
+
+
+def test_success_is_charged_its_tokens():
+    async def generate(request):
+        return 1200
+
+    pregenerator = scheduler(generate)
+    pregenerator.record("key", "request")
+    assert asyncio.run(pregenerator.run_once()) == 1
+    assert pregenerator.tokens_used == 1200
+
+
+def test_tracker_evicts_coldest_keys_in_batches():
+    tracker = PopularityTracker(max_keys=10)
+    for _ in range(3):
+        tracker.record("hot", "request")
+    for i in range(10):
+        tracker.record(f"cold-{i}", "request")
+    # Going over max_keys dropped the coldest tenth, keeping the popular key
+    assert len(tracker) == 9
+    assert "hot" in tracker and "cold-0" not in tracker
@@ -0,0 +1,19 @@
+from rate_limit import RateLimiter
+
+
+def test_refund_restores_the_tokens_taken():
+    limiter = RateLimiter(rate_per_minute=0.001, burst=2)
+    assert limiter.acquire("a") == 0
+    limiter.refund("a")
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+    assert limiter.stats()["allowed"] == 2
+
+
+def test_refund_never_exceeds_burst():
+    limiter = RateLimiter(rate_per_minute=0.001, burst=1)
+    assert limiter.acquire("a") == 0
+    limiter.refund("a", 5)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Backend Load & Latency Benchmark for Atal Idea Generator
+Drives concurrent load against the read and generation endpoints and reports throughput and p50/p95/p99 latency.
+Not benchmarked: component import, /api/models, /api/metrics, /api/test-llm,
+GET /api/ideas/{id} and job status polling.
+
+By default the FastAPI app runs in-process against the deterministic mock LLM
+backend (LLM_BACKEND=mock) with rate limits off, so no network or API key is
+needed. Use --url to benchmark a running server instead; all load then comes
+from one IP and counts against that server's per-client and per-IP quotas, so
+start it with RATE_LIMIT_PER_MINUTE=0 and RATE_LIMIT_IP_PER_MINUTE=0 or the
+generation scenarios mostly measure 429s. Requires httpx.
+
+Examples:
+    python backend_benchmark.py --concurrency 1,50,500 --output bench.json
+    python backend_benchmark.py --compare bench.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+GENERATION_REQUEST = {
+    "selected_components": [
+        {"id": "arduino_uno", "name": "Arduino Uno", "category": "Microcontrollers"},
+        {"id": "ultrasonic_sensor", "name": "Ultrasonic Sensor", "category": "Sensors"},
+        {"id": "servo_motor", "name": "Servo Motor", "category": "Actuators"}
+    ],
+    "preferences": {"theme": "Robotics", "skillLevel": "Beginner", "count": 3}
+}
+
+
+def uncached_generation(i: int) -> Dict[str, Any]:
+    """A generation request that misses the cache and coalescing"""
+    request = json.loads(json.dumps(GENERATION_REQUEST))
+    request["preferences"]["theme"] = f"Robotics {i}"
+    request["use_cache"] = False
+    return request
+
+
+def uncached_batch(i: int) -> Dict[str, Any]:
+    """Three distinct uncached requests in one batch"""
+    return {"requests": [uncached_generation(i * 3 + k) for k in range(3)]}
+
+
+BUILDABLE_REQUEST = {"selected_components": GENERATION_REQUEST["selected_components"], "max_missing": 2}
+LIST_FIELDS = "title,difficulty,tags,estimated_cost"
+
+# name -> (method, path, body factory taking the request number)
+SCENARIOS: Dict[str, Any] = {
+    "health": ("GET", "/api/health", None),
+    "components": ("GET", "/api/components", None),
+    "component_by_id": ("GET", "/api/components/arduino_uno", None),
+    "components_by_category": ("GET", "/api/components/category/Sensors", None),
+    "components_search": ("GET", "/api/components/search?q=sens", None),
+    "generate_cached": ("POST", "/api/generate-ideas", lambda i: GENERATION_REQUEST),
+    "generate_uncached": ("POST", "/api/generate-ideas", uncached_generation),
+    "generate_stream": ("POST", "/api/generate-ideas/stream", uncached_generation),
+    "generate_batch": ("POST", "/api/generate-ideas/batch", uncached_batch),
+    # Enqueue latency only; cached requests keep the jobs from loading later scenarios
+    "generate_job_submit": ("POST", "/api/generate-ideas/jobs", lambda i: GENERATION_REQUEST),
+    "ideas_list": ("GET", "/api/ideas?limit=20", None),
+    "ideas_list_projected": ("GET", f"/api/ideas?limit=20&fields={LIST_FIELDS}", None),
+    "ideas_list_msgpack": ("GET", f"/api/ideas?limit=20&fields={LIST_FIELDS}", None),
+    "ideas_buildable": ("POST", "/api/ideas/buildable", lambda i: BUILDABLE_REQUEST),
+    "ideas_search": ("GET", "/api/ideas/search?q=mock", None),
+    "ideas_stats": ("GET", "/api/ideas/stats", None),
+    "cache_stats": ("GET", "/api/cache/stats", None),
+}
+
+# Extra request headers per scenario
+SCENARIO_HEADERS: Dict[str, Dict[str, str]] = {
+    "ideas_list_msgpack": {"Accept": "application/msgpack"},
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@asynccontextmanager
+async def in_process_client(args):
+    """Start the app in this process against the mock LLM with throwaway storage"""
+    data_dir = tempfile.mkdtemp(prefix="atal-bench-")
+    os.environ["LLM_BACKEND"] = "mock"
+    os.environ["MOCK_LLM_LATENCY_MS"] = str(args.mock_latency_ms)
+    os.environ["MOCK_LLM_TOKENS_PER_SECOND"] = str(args.mock_tokens_per_second)
+    os.environ["MOCK_LLM_FAILURE_RATE"] = str(args.mock_failure_rate)
+    os.environ["MOCK_LLM_SEED"] = str(args.seed)
+    os.environ["IDEA_DB_PATH"] = os.path.join(data_dir, "ideas.db")
+    os.environ["COMPONENTS_FILE"] = os.path.join(data_dir, "components.jsonl")
+    # All load comes from one client, so per-client quotas would only measure the limiter
+    os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+    os.environ["RATE_LIMIT_IP_PER_MINUTE"] = "0"
+    # Keep per-request log lines out of the report
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, BACKEND_DIR)
+    import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+            yield client
+
+
+@asynccontextmanager
+async def remote_client(args):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        yield client
+
+
+class LoadRunner:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def request(self, method: str, path: str, body: Optional[Callable[[int], Any]], i: int,
+                      headers: Optional[Dict[str, str]] = None) -> bool:
+        if method == "GET":
+            response = await self.client.get(path, headers=headers)
+        else:
+            response = await self.client.post(path, json=body(i), headers=headers)
+        await response.aread()
+        return response.status_code < 400
+
+    async def run(self, name: str, concurrency: int, requests_per_worker: int) -> Dict[str, Any]:
+        """Closed-loop load: each worker sends its next request as soon as the last completes"""
+        method, path, body = SCENARIOS[name]
+        headers = SCENARIO_HEADERS.get(name)
+        latencies: List[float] = []
+        errors = 0
+        counter = iter(range(concurrency * requests_per_worker))
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    ok = await self.request(method, path, body, i, headers)
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - started) * 1000)
+                if not ok:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "scenario": name,
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "errors": errors,
+            "duration_s": round(elapsed, 4),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50), 3),
+                "p95": round(percentile(latencies, 0.95), 3),
+                "p99": round(percentile(latencies, 0.99), 3),
+                "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                "max": round(latencies[-1], 3) if latencies else 0.0,
+            },
+        }
+
+
+def compare(results: Dict[str, Any], baseline_path: str, max_regression: float) -> List[str]:
+    """List regressions beyond max_regression against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if not before:
+            continue
+        label = f"{result['scenario']} @ {result['concurrency']}"
+        p95_before, p95_after = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        if p95_before and p95_after > p95_before * (1 + max_regression):
+            regressions.append(f"{label}: p95 {p95_before:.1f}ms -> {p95_after:.1f}ms")
+        rps_before, rps_after = before["throughput_rps"], result["throughput_rps"]
+        if rps_before and rps_after < rps_before * (1 - max_regression):
+            regressions.append(f"{label}: throughput {rps_before:.1f} -> {rps_after:.1f} req/s")
+    return regressions
+
+
+async def run_benchmarks(args) -> Dict[str, Any]:
+    scenarios = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    client_factory = remote_client if args.url else in_process_client
+    results = []
+    async with client_factory(args) as client:
+        runner = LoadRunner(client)
+        # Warm caches and lazy initialization before measuring
+        await runner.run("generate_cached", 1, 1)
+        for name in scenarios:
+            for level in levels:
+                result = await runner.run(name, level, args.requests)
+                results.append(result)
+                latency = result["latency_ms"]
+                print(f"📈 {name:<24} c={level:<4} {result['throughput_rps']:>9.1f} req/s  "
+                      f"p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms p99={latency['p99']:.1f}ms  "
+                      f"errors={result['errors']}")
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "target": args.url or "in-process",
+            "requests_per_worker": args.requests,
+            "mock_llm": None if args.url else {
+                "latency_ms": args.mock_latency_ms,
+                "tokens_per_second": args.mock_tokens_per_second,
+                "failure_rate": args.mock_failure_rate,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the backend API")
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app (disable its rate limits first)")
+    parser.add_argument("--scenarios", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,50", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per worker per scenario")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mock-latency-ms", type=float, default=200)
+    parser.add_argument("--mock-tokens-per-second", type=float, default=0)
+    parser.add_argument("--mock-failure-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed fractional p95 increase / throughput drop before failing")
+    args = parser.parse_args()
+
+    print("🚀 Starting Atal Idea Generator Backend Benchmark")
+    print("=" * 60)
+    results = asyncio.run(run_benchmarks(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print("\n❌ PERFORMANCE REGRESSIONS:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions beyond {:.0%}".format(args.max_regression))
+
+
+if __name__ == "__main__":
+    main()
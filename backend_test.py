@@ -9,6 +9,7 @@ import json
 from datetime import datetime
 from typing import Dict, Any, List
 import sys
+import time
 import os
 
 # Get backend URL from environment
@@ -147,6 +148,25 @@ class BackendTester:
         except requests.exceptions.RequestException as e:
             self.log_test("Get Components by Category", False, f"Connection error: {str(e)}")
     
+    def test_search_components(self):
+        """Test GET /api/components/search"""
+        try:
+            response = self.session.get(f"{API_BASE}/components/search", params={"q": "sens"}, timeout=10)
+            
+            if response.status_code == 200:
+                components = response.json()
+                if isinstance(components, list) and components and all("sens" in comp.get("name", "").lower() or "sens" in comp.get("description", "").lower() for comp in components):
+                    self.log_test("Search Components", True, f"Found {len(components)} components for 'sens'",
+                                {"ids": [comp.get("id") for comp in components]})
+                else:
+                    self.log_test("Search Components", False, "Search returned no or non-matching components",
+                                {"response": components})
+            else:
+                self.log_test("Search Components", False, f"Unexpected status code: {response.status_code}")
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Search Components", False, f"Connection error: {str(e)}")
+    
     def test_llm_connection(self):
         """Test /api/test-llm endpoint"""
         try:
@@ -226,6 +246,188 @@ class BackendTester:
         except requests.exceptions.RequestException as e:
             self.log_test("AI Idea Generation", False, f"Connection error: {str(e)}")
     
+    def test_cache_stats(self):
+        """Test /api/cache/stats endpoint"""
+        try:
+            response = self.session.get(f"{API_BASE}/cache/stats", timeout=10)
+            
+            if response.status_code == 200:
+                data = response.json()
+                required_fields = ["enabled", "entries", "hits", "misses", "hit_ratio"]
+                
+                if all(field in data for field in required_fields):
+                    self.log_test("Cache Stats", True, 
+                                f"Cache stats available: {data['hits']} hits, {data['misses']} misses",
+                                {"response": data})
+                else:
+                    self.log_test("Cache Stats", False, "Missing required fields in cache stats",
+                                {"response": data})
+            else:
+                self.log_test("Cache Stats", False, f"Unexpected status code: {response.status_code}",
+                            {"status_code": response.status_code, "response": response.text})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Cache Stats", False, f"Connection error: {str(e)}")
+    
+    def test_streaming_generation(self):
+        """Test /api/generate-ideas/stream endpoint"""
+        try:
+            generation_request = {
+                "selected_components": [
+                    {"id": "esp32", "name": "ESP32", "category": "Microcontrollers"},
+                    {"id": "temp_humidity", "name": "Temperature & Humidity Sensor", "category": "Sensors"}
+                ],
+                "preferences": {"theme": "Agriculture", "skillLevel": "Beginner", "count": 2}
+            }
+            
+            response = self.session.post(f"{API_BASE}/generate-ideas/stream", 
+                                       json=generation_request, timeout=60, stream=True)
+            
+            if response.status_code == 200:
+                events = [json.loads(line) for line in response.iter_lines() if line]
+                ideas = [event["data"] for event in events if event.get("event") == "idea"]
+                
+                if events and events[-1].get("event") == "done" and ideas:
+                    self.log_test("Streaming Idea Generation", True, 
+                                f"Streamed {len(ideas)} ideas",
+                                {"sample_title": ideas[0].get("title")})
+                else:
+                    self.log_test("Streaming Idea Generation", False, "Stream did not finish with ideas",
+                                {"events": events[-3:]})
+            else:
+                self.log_test("Streaming Idea Generation", False, f"Unexpected status code: {response.status_code}",
+                            {"status_code": response.status_code, "response": response.text})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Streaming Idea Generation", False, f"Connection error: {str(e)}")
+    
+    def test_ideas_store(self):
+        """Test /api/ideas listing, search and stats endpoints"""
+        try:
+            response = self.session.get(f"{API_BASE}/ideas", params={"limit": 5}, timeout=10)
+            
+            if response.status_code == 200 and "items" in response.json():
+                page = response.json()
+                self.log_test("List Ideas", True, f"Listed {len(page['items'])} stored ideas",
+                            {"next_cursor": page.get("next_cursor")})
+            else:
+                self.log_test("List Ideas", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+            
+            response = self.session.get(f"{API_BASE}/ideas", params={"limit": 5, "fields": "title,difficulty"}, timeout=10)
+            
+            if response.status_code == 200 and all(set(idea) <= {"id", "title", "difficulty"}
+                                                   for idea in response.json().get("items", [])):
+                self.log_test("Project Idea Fields", True, f"Listed {len(response.json()['items'])} projected ideas")
+            else:
+                self.log_test("Project Idea Fields", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+            
+            response = self.session.get(f"{API_BASE}/ideas/search", params={"q": "smart"}, timeout=10)
+            
+            if response.status_code == 200 and isinstance(response.json().get("items"), list):
+                self.log_test("Search Ideas", True, f"Search returned {len(response.json()['items'])} ideas")
+            else:
+                self.log_test("Search Ideas", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+            
+            response = self.session.get(f"{API_BASE}/ideas/stats", timeout=10)
+            
+            if response.status_code == 200 and "total" in response.json():
+                self.log_test("Idea Stats", True, f"{response.json()['total']} ideas stored",
+                            {"response": response.json()})
+            else:
+                self.log_test("Idea Stats", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Idea Store", False, f"Connection error: {str(e)}")
+    
+    def test_buildable_ideas(self):
+        """Test finding stored ideas buildable with a fixed set of parts"""
+        try:
+            kit = {
+                "selected_components": [
+                    {"id": "arduino_uno", "name": "Arduino Uno", "category": "Microcontrollers"},
+                    {"id": "led_strip", "name": "LED Strip", "category": "Output"}
+                ],
+                "max_missing": 1
+            }
+            response = self.session.post(f"{API_BASE}/ideas/buildable", json=kit, timeout=10)
+            
+            if response.status_code != 200:
+                self.log_test("Buildable Ideas", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+                return
+            
+            data = response.json()
+            if all(len(idea.get("missing_components", [])) <= 1 for idea in data.get("items", [])):
+                self.log_test("Buildable Ideas", True,
+                            f"{data['total']} of {data['indexed']} stored ideas need at most one extra part")
+            else:
+                self.log_test("Buildable Ideas", False, "Ideas missing more parts than allowed", {"response": data})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Buildable Ideas", False, f"Connection error: {str(e)}")
+    
+    def test_generation_jobs(self):
+        """Test queuing a background generation job and polling it to completion"""
+        try:
+            test_request = {
+                "selected_components": [{"id": "arduino_uno", "name": "Arduino Uno", "category": "Microcontrollers"}],
+                "preferences": {"theme": "Education", "count": 2}
+            }
+            response = self.session.post(f"{API_BASE}/generate-ideas/jobs", json=test_request, timeout=10)
+            
+            if response.status_code != 202 or "job_id" not in response.json():
+                self.log_test("Generation Jobs", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+                return
+            
+            job_id = response.json()["job_id"]
+            job = {}
+            for _ in range(60):
+                job = self.session.get(f"{API_BASE}/generate-ideas/jobs/{job_id}", timeout=10).json()
+                if job.get("status") in ("succeeded", "failed"):
+                    break
+                time.sleep(1)
+            
+            if job.get("status") == "succeeded" and job["result"]["ideas"]:
+                self.log_test("Generation Jobs", True, f"Job produced {len(job['result']['ideas'])} ideas")
+            else:
+                self.log_test("Generation Jobs", False, f"Job ended as {job.get('status')}",
+                            {"error": job.get("error")})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Generation Jobs", False, f"Connection error: {str(e)}")
+    
+    def test_batch_generation(self):
+        """Test batch generation with a duplicated entry"""
+        try:
+            item = {
+                "selected_components": [{"id": "led_strip", "name": "LED Strip", "category": "Output"}],
+                "preferences": {"theme": "Art", "count": 2}
+            }
+            response = self.session.post(f"{API_BASE}/generate-ideas/batch", json={"requests": [item, item]}, timeout=60)
+            
+            if response.status_code != 200:
+                self.log_test("Batch Generation", False, f"Unexpected response: {response.status_code}",
+                            {"response": response.text})
+                return
+            
+            events = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+            items = [event["data"] for event in events if event["event"] == "item"]
+            done = events[-1]["data"] if events and events[-1]["event"] == "done" else {}
+            
+            if len(items) == 2 and done.get("unique") == 1 and done.get("succeeded") == 2:
+                self.log_test("Batch Generation", True, "Duplicate entries generated once and answered twice",
+                            {"done": done})
+            else:
+                self.log_test("Batch Generation", False, "Unexpected batch results", {"done": done})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Batch Generation", False, f"Connection error: {str(e)}")
+    
     def test_ai_generation_edge_cases(self):
         """Test AI generation with edge cases"""
         
@@ -272,9 +474,16 @@ class BackendTester:
         # Test all actual endpoints
         self.test_health_check()
         self.test_components_api()
+        self.test_search_components()
         self.test_llm_connection()
         self.test_ai_idea_generation()
+        self.test_streaming_generation()
+        self.test_generation_jobs()
+        self.test_batch_generation()
+        self.test_ideas_store()
+        self.test_buildable_ideas()
         self.test_ai_generation_edge_cases()
+        self.test_cache_stats()
         
         # Summary
         print("\n" + "=" * 60)
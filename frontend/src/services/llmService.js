@@ -5,15 +5,26 @@
 
 const API_BASE_URL = 'http://localhost:8001/api';
 
+// Identifies this browser tab to the backend's per-client rate limits
+function getSessionId() {
+  let sessionId = sessionStorage.getItem('atal_session_id');
+  if (!sessionId) {
+    sessionId = window.crypto?.randomUUID ? window.crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem('atal_session_id', sessionId);
+  }
+  return sessionId;
+}
+
 class LLMService {
   constructor() {
     this.baseURL = API_BASE_URL;
+    this.sessionId = getSessionId();
   }
 
   /**
    * Generate project ideas using backend LLM service
    */
-  async generateIdeas(components, preferences = {}) {
+  async generateIdeas(components, preferences = {}, modelId = 'gpt-4o-mini') {
     try {
       console.log('🚀 Calling backend LLM service for idea generation');
       console.log('Components:', components);
@@ -23,11 +34,12 @@ class LLMService {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'X-Session-Id': this.sessionId,
         },
         body: JSON.stringify({
           selected_components: components,
           preferences: preferences,
-          model_id: 'gpt-4o-mini'
+          model_id: modelId
         })
       });
 
@@ -58,8 +70,7 @@ class LLMService {
    * Enhanced idea generation with specific model selection
    */
   async generateIdeasWithModel(components, preferences = {}, modelId = 'gpt-4o-mini') {
-    // For now, we use the same method since backend handles model selection
-    return this.generateIdeas(components, { ...preferences, model: modelId });
+    return this.generateIdeas(components, preferences, modelId);
   }
 
   /**
@@ -123,6 +134,12 @@ class LLMService {
         name: 'Gemini 2.0 Flash',
         description: 'Fast and efficient Google model',
         provider: 'Google'
+      },
+      {
+        id: 'auto',
+        name: 'Auto',
+        description: 'Backend picks the fastest healthy model and fails over if one is down',
+        provider: 'Any'
       }
     ];
   }
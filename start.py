@@ -2,64 +2,155 @@
 """
 Atal Idea Generator - Single Startup Script
 Starts both backend and frontend servers
+
+Usage:
+    python start.py                  # development: uvicorn --reload + yarn start
+    python start.py --prod           # production: multi-worker backend with readiness checks and restarts
+    python start.py --prod --workers 8 --backend-only
 """
 
+import argparse
+import importlib.util
 import subprocess
 import sys
 import os
+import re
 import time
 import signal
+import urllib.error
+import urllib.request
 from threading import Thread
 
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(APP_DIR, 'backend')
+FRONTEND_DIR = os.path.join(APP_DIR, 'frontend')
+BACKEND_PORT = int(os.environ.get('BACKEND_PORT', '8001'))
+HEALTH_URL = f"http://127.0.0.1:{BACKEND_PORT}/api/health"
+
+def requirements_satisfied(requirements_path: str) -> bool:
+    """True if every requirement is installed, and pinned ones at the pinned version"""
+    from importlib import metadata
+
+    with open(requirements_path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line or line.startswith('-'):
+                continue
+            match = re.match(r"([A-Za-z0-9_.\-]+)(\[[^\]]*\])?\s*(==\s*([^\s;]+))?", line)
+            if not match:
+                return False
+            try:
+                installed = metadata.version(match.group(1))
+            except metadata.PackageNotFoundError:
+                return False
+            if match.group(4) and installed != match.group(4):
+                return False
+    return True
+
+def forward_output(process: subprocess.Popen, prefix: str):
+    """Drain a child's output so its pipe never fills up and blocks it"""
+    for line in iter(process.stdout.readline, b''):
+        sys.stdout.write(f"{prefix} {line.decode('utf-8', errors='replace')}")
+        sys.stdout.flush()
+    process.stdout.close()
+
 class ServerManager:
-    def __init__(self):
+    def __init__(self, production: bool = False, workers: int = 1, backend_only: bool = False):
         self.backend_process = None
         self.frontend_process = None
         self.running = False
+        self.production = production
+        self.workers = workers
+        self.backend_only = backend_only
+        self.backend_restarts = []
+
+    def spawn(self, command, cwd: str, prefix: str, env=None) -> subprocess.Popen:
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        Thread(target=forward_output, args=(process, prefix), daemon=True).start()
+        return process
+
+    def backend_command(self):
+        if not self.production:
+            return [sys.executable, '-m', 'uvicorn', 'server:app',
+                    '--host', '0.0.0.0', '--port', str(BACKEND_PORT), '--reload']
+        if importlib.util.find_spec('gunicorn') is not None:
+            # Gunicorn (pinned in requirements.txt) replaces workers that crash or hang
+            return [sys.executable, '-m', 'gunicorn', 'server:app',
+                    '--worker-class', 'uvicorn.workers.UvicornWorker',
+                    '--workers', str(self.workers),
+                    '--bind', f'0.0.0.0:{BACKEND_PORT}',
+                    '--timeout', '120', '--graceful-timeout', '30', '--keep-alive', '5']
+        # Without gunicorn, crashed workers are not replaced
+        return [sys.executable, '-m', 'uvicorn', 'server:app',
+                '--host', '0.0.0.0', '--port', str(BACKEND_PORT),
+                '--workers', str(self.workers), '--no-access-log']
+
+    def wait_until_ready(self, timeout: float = 60.0) -> bool:
+        """Poll the health endpoint until it answers or the backend exits"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.backend_process.poll() is not None:
+                return False
+            try:
+                with urllib.request.urlopen(HEALTH_URL, timeout=2) as response:
+                    if response.status == 200:
+                        return True
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(0.25)
+        return False
 
     def start_backend(self):
         """Start the FastAPI backend server"""
-        print("🚀 Starting Backend Server on http://localhost:8001")
+        mode = f"production, {self.workers} workers" if self.production else "development"
+        print(f"🚀 Starting Backend Server on http://localhost:{BACKEND_PORT} ({mode})")
         try:
-            # Change to backend directory
-            os.chdir('/app/backend')
-            
-            # Install requirements if needed
-            subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], 
-                         check=True, capture_output=True)
-            
+            # Install requirements only when something is missing or at the wrong version
+            if not requirements_satisfied(os.path.join(BACKEND_DIR, 'requirements.txt')):
+                print("📦 Installing backend dependencies...")
+                subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'],
+                               cwd=BACKEND_DIR, check=True, capture_output=True)
+
             # Start the backend server
-            self.backend_process = subprocess.Popen([
-                sys.executable, '-m', 'uvicorn', 'server:app', 
-                '--host', '0.0.0.0', '--port', '8001', '--reload'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
-            print("✅ Backend server started successfully")
-            
+            started = time.monotonic()
+            # Workers split per-process budgets (e.g. background pre-generation tokens) by this count
+            env = {**os.environ, 'WEB_CONCURRENCY': str(self.workers if self.production else 1)}
+            self.backend_process = self.spawn(self.backend_command(), BACKEND_DIR, "[backend]", env)
+
+            if not self.wait_until_ready():
+                print("❌ Backend did not become ready")
+                return False
+            print(f"✅ Backend server ready in {time.monotonic() - started:.1f}s")
+
         except Exception as e:
             print(f"❌ Failed to start backend: {e}")
             return False
         return True
 
+    def restart_backend(self):
+        """Restart a backend that exited, backing off if it keeps crashing"""
+        now = time.monotonic()
+        self.backend_restarts = [t for t in self.backend_restarts if now - t < 60] + [now]
+        delay = min(30, 2 ** (len(self.backend_restarts) - 1))
+        print(f"⚠️ Backend exited with code {self.backend_process.returncode}; restarting in {delay}s")
+        time.sleep(delay)
+        if self.running and not self.start_backend():
+            print("❌ Backend restart failed")
+
     def start_frontend(self):
         """Start the React frontend server"""
         print("🚀 Starting Frontend Server on http://localhost:3000")
         try:
-            # Change to frontend directory
-            os.chdir('/app/frontend')
-            
             # Install dependencies if needed
-            if not os.path.exists('node_modules'):
+            if not os.path.exists(os.path.join(FRONTEND_DIR, 'node_modules')):
                 print("📦 Installing frontend dependencies...")
-                subprocess.run(['yarn', 'install'], check=True)
-            
+                subprocess.run(['yarn', 'install'], cwd=FRONTEND_DIR, check=True)
+
             # Start the frontend server
-            self.frontend_process = subprocess.Popen([
-                'yarn', 'start'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
+            self.frontend_process = self.spawn(['yarn', 'start'], FRONTEND_DIR, "[frontend]")
+
             print("✅ Frontend server started successfully")
-            
+
         except Exception as e:
             print(f"❌ Failed to start frontend: {e}")
             return False
@@ -69,12 +160,15 @@ class ServerManager:
         """Stop both servers"""
         print("\n🛑 Stopping servers...")
         self.running = False
-        
+
         if self.backend_process:
             self.backend_process.terminate()
-            self.backend_process.wait()
+            try:
+                self.backend_process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.backend_process.kill()
             print("✅ Backend server stopped")
-        
+
         if self.frontend_process:
             self.frontend_process.terminate()
             self.frontend_process.wait()
@@ -90,39 +184,49 @@ class ServerManager:
         """Start both servers"""
         print("🌟 Atal Idea Generator - Starting Application")
         print("=" * 50)
-        
-        # Set up signal handler for Ctrl+C
+
+        # Set up signal handlers for Ctrl+C and process managers
         signal.signal(signal.SIGINT, self.signal_handler)
-        
-        # Start backend
+        signal.signal(signal.SIGTERM, self.signal_handler)
+
+        # Start backend and wait until it answers health checks
         if not self.start_backend():
+            self.stop_servers()
             return False
-        
-        # Wait a bit for backend to start
-        time.sleep(3)
-        
+
         # Start frontend
-        if not self.start_frontend():
+        if not self.backend_only and not self.start_frontend():
             self.stop_servers()
             return False
-        
+
         self.running = True
-        
+
         print("\n" + "=" * 50)
         print("🎉 Application Started Successfully!")
-        print("📱 Frontend: http://localhost:3000")
-        print("🔧 Backend API: http://localhost:8001")
-        print("📚 API Docs: http://localhost:8001/docs")
-        print("\n💡 Press Ctrl+C to stop both servers")
+        if not self.backend_only:
+            print("📱 Frontend: http://localhost:3000")
+        print(f"🔧 Backend API: http://localhost:{BACKEND_PORT}")
+        print(f"📚 API Docs: http://localhost:{BACKEND_PORT}/docs")
+        print("\n💡 Press Ctrl+C to stop")
         print("=" * 50)
-        
-        # Keep the main thread alive
+
+        # Keep the main thread alive, restarting the backend if it dies
         try:
             while self.running:
                 time.sleep(1)
+                if self.production and self.backend_process.poll() is not None:
+                    self.restart_backend()
         except KeyboardInterrupt:
             self.signal_handler(signal.SIGINT, None)
 
 if __name__ == "__main__":
-    manager = ServerManager()
-    manager.start_all()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Start the Atal Idea Generator")
+    parser.add_argument("--prod", action="store_true", help="Run the backend with multiple workers and no reload")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)),
+                        help="Backend worker processes in production mode (default: CPU count)")
+    parser.add_argument("--backend-only", action="store_true", help="Don't start the frontend dev server")
+    args = parser.parse_args()
+
+    manager = ServerManager(production=args.prod, workers=max(1, args.workers), backend_only=args.backend_only)
+    if manager.start_all() is False:
+        sys.exit(1)